@@ -0,0 +1,165 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from deliveries_cache import duplicate_seasons
+from forecast import FORECASTS
+from ml_forecast import FEATURE_COLUMNS, ROLE_QUALIFIERS, ROLE_TARGETS, load_feature_table, train_models
+
+# Walk-forward backtest of the next-season forecasts. For each cutoff
+# season every model is fitted on the seasons before it only and forecasts
+# it; the forecasts are scored against the players who played the season
+# before and batted (or bowled) in the cutoff season. A season whose file is
+# a copy of an earlier one (IPL2018.csv repeats IPL2017.csv) is neither a
+# cutoff nor in the feature table (see ml_forecast.load_feature_table): its
+# forecasts would be scored against the season it came from, and training on
+# it would teach the models that a season repeats the one before.
+#
+# Models:
+#   baseline      - predict.py's exponentially weighted average plus offset
+#   last_season   - the metric in the season before, unchanged
+#   random_forest - the learned models of ml_forecast.py
+MODELS = ['baseline', 'last_season', 'random_forest']
+
+FIRST_CUTOFF = 2010
+LAST_CUTOFF = 2024
+
+# Feature table shared by the folds a worker process runs, set once per
+# worker so that it is not sent (or read from disk) again for every fold
+_features = None
+
+def _init_worker(features):
+    global _features
+    _features = features
+
+def evaluation_rows(features, role, season):
+    """
+    Player-seasons forecasting `season`: played the year before, played the
+    role in it (the rows ml_forecast.training_rows learns from)
+    """
+    rows = (features['next_year'] == season) & features['consecutive'] & \
+        (features[f"next_{ROLE_QUALIFIERS[role]}"] > 0)
+    return features[rows.to_numpy()]
+
+def _errors(season, role, target, model, predicted, actual):
+    error = np.asarray(predicted, dtype=float) - np.asarray(actual, dtype=float)
+    return {
+        'season': season,
+        'role': role,
+        'target': target,
+        'model': model,
+        'players': len(error),
+        'mae': np.abs(error).mean() if len(error) else np.nan,
+        'rmse': np.sqrt((error ** 2).mean()) if len(error) else np.nan,
+        'bias': error.mean() if len(error) else np.nan
+    }
+
+def run_fold(season, n_estimators=100):
+    """
+    Fit every model on the seasons before `season` and score its forecasts
+    of `season`. Returns (season, error records, timings in seconds).
+    """
+    start = time.perf_counter()
+    models = train_models(_features, through_season=season - 1, n_estimators=n_estimators, n_jobs=1)
+    train_time = time.perf_counter() - start
+    
+    offsets = {metric: offset for metric, offset in FORECASTS.values()}
+    records = []
+    for role, targets in ROLE_TARGETS.items():
+        rows = evaluation_rows(_features, role, season)
+        fitted = models[role]
+        learned = fitted['model'].predict(fitted['scaler'].transform(rows[FEATURE_COLUMNS])) if len(rows) else None
+        for position, target in enumerate(targets):
+            actual = rows[f"next_{target}"]
+            predictions = {
+                'baseline': rows[f"{target}_ewm"] + offsets[target],
+                'last_season': rows[f"{target}_lag1"],
+                'random_forest': learned[:, position] if learned is not None else []
+            }
+            for model in MODELS:
+                records.append(_errors(season, role, target, model, predictions[model], actual))
+    return season, records, {'train': train_time, 'total': time.perf_counter() - start}
+
+def backtest(features, seasons, max_workers=None, n_estimators=100, duplicates=()):
+    """
+    Run the folds of the cutoff seasons on a process pool (one worker per
+    core by default), all sharing the feature table. duplicates are the
+    duplicate seasons (see deliveries_cache.duplicate_seasons), which must
+    not be in the table. Returns the errors of every (season, role, target,
+    model) and the runtime of every fold.
+    """
+    leaked = sorted(set(features['season'].astype(str)) & set(duplicates))
+    if leaked:
+        raise ValueError(f"The feature table holds the duplicate season(s) {', '.join(leaked)}; "
+                         f"build it with ml_forecast.load_feature_table")
+    max_workers = max_workers or os.cpu_count() or 1
+    print(f"Backtesting {len(seasons)} cutoff seasons on {max_workers} worker(s)...")
+    
+    errors, timings = [], []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(features,)) as executor:
+        # Later seasons train on more data: start them first so that the
+        # short folds fill in at the end
+        futures = [executor.submit(run_fold, season, n_estimators) for season in sorted(seasons, reverse=True)]
+        for future in as_completed(futures):
+            season, records, fold_times = future.result()
+            print(f"IPL{season}: fitted in {fold_times['train']:.2f}s, done in {fold_times['total']:.2f}s")
+            errors.extend(records)
+            timings.append({'season': season, 'train_seconds': fold_times['train'],
+                            'fold_seconds': fold_times['total']})
+    
+    errors = pd.DataFrame(errors).sort_values(['season', 'role', 'target', 'model']).reset_index(drop=True)
+    timings = pd.DataFrame(timings).sort_values('season').reset_index(drop=True)
+    return errors, timings
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the next-season forecasts")
+    parser.add_argument('--dataset-folder', default='IPL_dataset',
+                        help="folder containing the IPL*.csv season files")
+    parser.add_argument('--first', type=int, default=FIRST_CUTOFF,
+                        help="first cutoff season")
+    parser.add_argument('--last', type=int, default=LAST_CUTOFF,
+                        help="last cutoff season")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="number of worker processes (default: one per CPU core)")
+    parser.add_argument('--n-estimators', type=int, default=100,
+                        help="trees per random forest")
+    parser.add_argument('--output', default='backtest.csv',
+                        help="CSV file to write the errors of every fold to")
+    args = parser.parse_args(argv)
+    
+    start = time.perf_counter()
+    features = load_feature_table(args.dataset_folder)
+    duplicates = duplicate_seasons(args.dataset_folder)
+    seasons = []
+    for season in range(args.first, args.last + 1):
+        if f"IPL{season}" in duplicates:
+            print(f"Skipping IPL{season}: its file repeats the matches of {duplicates[f'IPL{season}']}")
+        else:
+            seasons.append(season)
+    errors, timings = backtest(features, seasons, args.workers, args.n_estimators, duplicates)
+    elapsed = time.perf_counter() - start
+    
+    errors.to_csv(args.output, index=False)
+    print("\nMean absolute error per cutoff season:")
+    print(errors.pivot_table(index='season', columns=['target', 'model'], values='mae').round(2).to_string())
+    print("\nOver all cutoff seasons:")
+    # Folds without players (e.g. the season after a duplicate one, which
+    # nobody played the year before) have no errors to weigh
+    summary = errors[errors['players'] > 0].groupby(['target', 'model']).apply(
+        lambda group: pd.Series({
+            'players': group['players'].sum(),
+            'mae': np.average(group['mae'], weights=group['players']),
+            'rmse': np.sqrt(np.average(group['rmse'] ** 2, weights=group['players'])),
+            'bias': np.average(group['bias'], weights=group['players'])
+        }), include_groups=False)
+    print(summary.round(3).to_string())
+    print("\nFold runtimes:")
+    print(timings.round(2).to_string(index=False))
+    print(f"\nBacktested in {elapsed:.2f}s ({timings['fold_seconds'].sum():.2f}s of fold time), "
+          f"errors written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import numpy as np
+import pandas as pd
+from deliveries_cache import load_all_seasons, load_deliveries
+
+def build_batting_order(deliveries):
+    """
+    Batting order of every innings, from the order in which players first
+    appear as batter or non_striker (the striker of a delivery counts before
+    the non-striker). Returns a DataFrame with the columns
+    match_id, inning, player, position.
+    """
+    match_ids = deliveries['match_id'].to_numpy()
+    innings = deliveries['inning'].to_numpy()
+    
+    # Interleave striker and non-striker so that each delivery contributes
+    # the batter first and then the non-striker
+    appearances = pd.DataFrame({
+        'match_id': np.repeat(match_ids, 2),
+        'inning': np.repeat(innings, 2),
+        'player': np.column_stack([
+            deliveries['batter'].astype(object).to_numpy(),
+            deliveries['non_striker'].astype(object).to_numpy()
+        ]).ravel()
+    })
+    extra_columns = [column for column in ['season'] if column in deliveries.columns]
+    for column in extra_columns:
+        appearances[column] = np.repeat(deliveries[column].to_numpy(), 2)
+    
+    order = appearances.drop_duplicates(['match_id', 'inning', 'player'])
+    order = order.assign(position=order.groupby(['match_id', 'inning']).cumcount() + 1)
+    order = order[extra_columns + ['match_id', 'inning', 'player', 'position']]
+    return order.reset_index(drop=True)
+
+def load_batting_order(csv_file=None, dataset_folder='IPL_dataset'):
+    """Batting order table of one season file, or of every season in the dataset folder"""
+    if csv_file is not None:
+        return build_batting_order(load_deliveries(csv_file))
+    return build_batting_order(load_all_seasons(dataset_folder))
+
+def player_batting_positions(batting_order, player_name):
+    """
+    Batting position of a player in each match they batted in, taken from
+    their first innings of the match (super overs are ignored).
+    """
+    positions = batting_order[batting_order['player'] == player_name]
+    positions = positions.sort_values('inning').drop_duplicates('match_id')
+    return positions[['match_id', 'position']].rename(columns={'position': 'batting_position'})
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write the batting order of every innings")
+    parser.add_argument('--input', default=None,
+                        help="ball-by-ball CSV of a single season (default: every season)")
+    parser.add_argument('--dataset-folder', default='IPL_dataset',
+                        help="folder containing the IPL*.csv season files")
+    parser.add_argument('--output', default='batting_order.csv',
+                        help="CSV file to write the table to")
+    args = parser.parse_args(argv)
+    
+    batting_order = load_batting_order(args.input, args.dataset_folder)
+    batting_order.to_csv(args.output, index=False)
+    print(f"Batting order of {batting_order.groupby(['match_id', 'inning']).ngroups} innings saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
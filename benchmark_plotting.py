@@ -0,0 +1,111 @@
+import argparse
+import os
+import tempfile
+import time
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.image as mpimg
+from matplotlib.figure import Figure
+import numpy as np
+import plotting
+import render_farm
+
+# Time spent in Figure.savefig (PNG encoding), which is the same for both
+# backends, so that it can be told apart from the time spent plotting
+_save_time = 0.0
+_savefig = Figure.savefig
+
+def _timed_savefig(self, *args, **kwargs):
+    global _save_time
+    start = time.perf_counter()
+    try:
+        return _savefig(self, *args, **kwargs)
+    finally:
+        _save_time += time.perf_counter() - start
+
+def time_backend(backend, jobs, output_folder, repeat):
+    """
+    Render every job repeat times with one backend. Returns the best
+    (total, plotting) time of each job, plotting being the total minus
+    the time spent saving the image, and the image files.
+    """
+    global _save_time
+    plotting.set_backend(backend)
+    timings = {}
+    images = {}
+    cwd = os.getcwd()
+    os.makedirs(output_folder, exist_ok=True)
+    os.chdir(output_folder)
+    Figure.savefig = _timed_savefig
+    try:
+        for job in jobs:
+            best = None
+            for _ in range(repeat):
+                _save_time = 0.0
+                start = time.perf_counter()
+                output_file = render_farm.render_job(job, force=True)
+                elapsed = time.perf_counter() - start
+                if best is None or elapsed < best[0]:
+                    best = (elapsed, elapsed - _save_time)
+            timings[job] = best
+            images[job] = os.path.join(output_folder, output_file)
+    finally:
+        Figure.savefig = _savefig
+        os.chdir(cwd)
+    return timings, images
+
+def image_difference(first_file, second_file):
+    """Mean absolute pixel difference (0-255) of two images, None if sizes differ"""
+    first, second = mpimg.imread(first_file), mpimg.imread(second_file)
+    if first.shape != second.shape:
+        return None
+    return float(np.abs(first[..., :3] - second[..., :3]).mean() * 255)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare dashboard render times of the plotting backends")
+    parser.add_argument('--player', default='SP Narine',
+                        help="player whose dashboards are rendered")
+    parser.add_argument('--root', default='players',
+                        help="folder searched for the per-player season CSVs")
+    parser.add_argument('--kinds', nargs='+', default=render_farm.PER_SEASON_KINDS + render_farm.PER_PLAYER_KINDS,
+                        choices=render_farm.PER_SEASON_KINDS + render_farm.PER_PLAYER_KINDS,
+                        help="dashboard kinds to render")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="renders per dashboard; the best time is kept")
+    args = parser.parse_args(argv)
+    
+    # Render into a scratch folder so the real dashboards are left alone
+    render_farm._players_root = os.path.abspath(args.root)
+    jobs = [job for job in render_farm.discover_jobs(args.kinds, args.root) if job[0] == args.player]
+    # One season is enough for the per-season kinds
+    seen = set()
+    jobs = [job for job in jobs if not (job[2] in seen or seen.add(job[2]))]
+    if not jobs:
+        raise SystemExit(f"No dashboards found for {args.player} under {args.root}")
+    
+    with tempfile.TemporaryDirectory() as scratch:
+        results = {}
+        for backend in plotting.BACKENDS:
+            results[backend] = time_backend(backend, jobs, os.path.join(scratch, backend), args.repeat)
+        
+        (seaborn_times, seaborn_images) = results['seaborn']
+        (fast_times, fast_images) = results['matplotlib']
+        print(f"{'':<16} {'---------- plotting ----------':>30} {'----------- total ------------':>30}")
+        print(f"{'dashboard':<16} {'seaborn':>9} {'matplotlib':>11} {'speedup':>8} "
+              f"{'seaborn':>9} {'matplotlib':>11} {'speedup':>8} {'pixel diff':>11}")
+        for job in jobs + ['total']:
+            if job == 'total':
+                seaborn_total, seaborn_plot = map(sum, zip(*seaborn_times.values()))
+                fast_total, fast_plot = map(sum, zip(*fast_times.values()))
+                label, difference = 'total', ''
+            else:
+                seaborn_total, seaborn_plot = seaborn_times[job]
+                fast_total, fast_plot = fast_times[job]
+                label = job[2]
+                difference = image_difference(seaborn_images[job], fast_images[job])
+                difference = 'size' if difference is None else f"{difference:.3f}"
+            print(f"{label:<16} {seaborn_plot:>8.3f}s {fast_plot:>10.3f}s {seaborn_plot / fast_plot:>7.2f}x "
+                  f"{seaborn_total:>8.3f}s {fast_total:>10.3f}s {seaborn_total / fast_total:>7.2f}x {difference:>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Bump when the cached layout changes so stale caches are rebuilt
+CACHE_VERSION = 1
+
+# Dictionary-encoded name columns of the ball-by-ball files
+CATEGORY_COLUMNS = [
+    'batting_team',
+    'bowling_team',
+    'batter',
+    'bowler',
+    'non_striker',
+    'extras_type',
+    'player_dismissed',
+    'dismissal_kind',
+    'fielder'
+]
+
+# Compact integer types of the counters
+INTEGER_COLUMNS = {
+    'match_id': 'int32',
+    'inning': 'int8',
+    'over': 'int8',
+    'ball': 'int8',
+    'batsman_runs': 'int8',
+    'extra_runs': 'int8',
+    'total_runs': 'int8',
+    'is_wicket': 'int8'
+}
+
+def season_name(csv_file):
+    """Season label of a ball-by-ball file, e.g. 'IPL2024' for IPL_dataset/IPL2024.csv"""
+    return os.path.splitext(os.path.basename(csv_file))[0]
+
+def find_season_files(dataset_folder='IPL_dataset'):
+    """All IPL*.csv season files in the dataset folder, oldest season first"""
+    files = glob.glob(os.path.join(dataset_folder, 'IPL*.csv'))
+    return sorted(f for f in files if re.fullmatch(r'IPL\d{4}', season_name(f)))
+
+def _source_signature(csv_file, with_hash=False):
+    """mtime/size of the source CSV, plus its SHA-1 when with_hash is set"""
+    stat = os.stat(csv_file)
+    signature = {
+        'version': CACHE_VERSION,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size
+    }
+    if with_hash:
+        sha1 = hashlib.sha1()
+        with open(csv_file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha1.update(block)
+        signature['sha1'] = sha1.hexdigest()
+    return signature
+
+def dataset_signature(dataset_folder='IPL_dataset'):
+    """mtime/size of every season file, to tell when tables built from them are stale"""
+    return {os.path.basename(csv_file): _source_signature(csv_file)
+            for csv_file in find_season_files(dataset_folder)}
+
+def cache_paths(csv_file, cache_folder=None):
+    """Paths of the cached frame and its metadata for a source CSV"""
+    if cache_folder is None:
+        cache_folder = os.path.join(os.path.dirname(os.path.abspath(csv_file)), '.cache')
+    base = os.path.join(cache_folder, season_name(csv_file))
+    return base + '.pkl', base + '.json'
+
+def read_deliveries(csv_file):
+    """Parse a ball-by-ball CSV straight into the compact dtypes"""
+    df = pd.read_csv(csv_file, dtype={column: 'category' for column in CATEGORY_COLUMNS})
+    for column, dtype in INTEGER_COLUMNS.items():
+        limits = np.iinfo(dtype)
+        if df[column].min() >= limits.min and df[column].max() <= limits.max:
+            df[column] = df[column].astype(dtype)
+        else:
+            # Keep the smallest type that still fits an unexpectedly large counter
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+    return df
+
+def is_cache_valid(csv_file, cache_folder=None):
+    """
+    Check the cache of a source CSV. The cheap mtime/size check is tried
+    first; when it fails the content hash decides, so a touched but
+    unchanged file does not force a rebuild.
+    """
+    data_file, meta_file = cache_paths(csv_file, cache_folder)
+    if not (os.path.exists(data_file) and os.path.exists(meta_file)):
+        return False
+    with open(meta_file) as f:
+        meta = json.load(f)
+    if meta.get('version') != CACHE_VERSION:
+        return False
+    
+    signature = _source_signature(csv_file)
+    if meta['mtime_ns'] == signature['mtime_ns'] and meta['size'] == signature['size']:
+        return True
+    
+    signature = _source_signature(csv_file, with_hash=True)
+    if meta.get('sha1') != signature['sha1']:
+        return False
+    # Same content under a new mtime: record it so the next check is cheap again
+    with open(meta_file, 'w') as f:
+        json.dump(signature, f)
+    return True
+
+def build_cache(csv_file, cache_folder=None):
+    """Convert a source CSV into its typed cache file and return the frame"""
+    data_file, meta_file = cache_paths(csv_file, cache_folder)
+    os.makedirs(os.path.dirname(data_file), exist_ok=True)
+    
+    signature = _source_signature(csv_file, with_hash=True)
+    df = read_deliveries(csv_file)
+    df.to_pickle(data_file)
+    with open(meta_file, 'w') as f:
+        json.dump(signature, f)
+    return df
+
+def load_deliveries(csv_file, cache_folder=None, use_cache=True):
+    """
+    Load a season's deliveries with compact dtypes, from the cache when it
+    is up to date and by converting the CSV (and refreshing the cache)
+    otherwise.
+    """
+    if not use_cache:
+        return read_deliveries(csv_file)
+    if is_cache_valid(csv_file, cache_folder):
+        return pd.read_pickle(cache_paths(csv_file, cache_folder)[0])
+    return build_cache(csv_file, cache_folder)
+
+def load_all_seasons(dataset_folder='IPL_dataset', cache_folder=None, use_cache=True):
+    """
+    Load every season into one frame with a categorical 'season' column.
+    Name columns stay categorical over the union of all seasons' names.
+    """
+    season_files = find_season_files(dataset_folder)
+    frames = [load_deliveries(csv_file, cache_folder, use_cache) for csv_file in season_files]
+    if not frames:
+        return pd.DataFrame()
+    
+    combined = {}
+    for column in frames[0].columns:
+        if column in CATEGORY_COLUMNS:
+            combined[column] = pd.Series(union_categoricals([df[column] for df in frames]))
+        else:
+            combined[column] = pd.concat([df[column] for df in frames], ignore_index=True)
+    combined['season'] = pd.Series(pd.Categorical.from_codes(
+        np.repeat(np.arange(len(frames)), [len(df) for df in frames]),
+        categories=[season_name(csv_file) for csv_file in season_files]
+    ))
+    return pd.DataFrame(combined)
+
+def duplicate_seasons(dataset_folder='IPL_dataset', cache_folder=None):
+    """
+    Seasons whose file holds the matches of an earlier season (a copied
+    file), as {season: earlier season}
+    """
+    seen = {}
+    duplicates = {}
+    for csv_file in find_season_files(dataset_folder):
+        match_ids = frozenset(load_deliveries(csv_file, cache_folder)['match_id'].unique().tolist())
+        if match_ids in seen:
+            duplicates[season_name(csv_file)] = seen[match_ids]
+        else:
+            seen[match_ids] = season_name(csv_file)
+    return duplicates
+
+def convert_dataset(dataset_folder='IPL_dataset', cache_folder=None, force=False):
+    """Build (or refresh) the cache of every season file in the dataset folder"""
+    for csv_file in find_season_files(dataset_folder):
+        start = time.perf_counter()
+        if force or not is_cache_valid(csv_file, cache_folder):
+            build_cache(csv_file, cache_folder)
+            action = 'converted'
+        else:
+            action = 'up to date'
+        print(f"{season_name(csv_file)}: {action} in {time.perf_counter() - start:.3f}s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the ball-by-ball CSVs into typed cache files")
+    parser.add_argument('--dataset-folder', default='IPL_dataset',
+                        help="folder containing the IPL*.csv season files")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild every cache file even if it is up to date")
+    args = parser.parse_args(argv)
+    
+    convert_dataset(args.dataset_folder, force=args.force)
+    
+    start = time.perf_counter()
+    df = load_all_seasons(args.dataset_folder)
+    print(f"Loaded {len(df)} deliveries from cache in {time.perf_counter() - start:.3f}s "
+          f"({df.memory_usage(deep=True).sum() / 2 ** 20:.1f} MB in memory)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from player_store import build_player_store, load_player_store
+from season_metrics import league_season_metrics
+
+# Next-season forecasts: forecast column -> (season metric, offset added).
+# Each forecast is the exponentially weighted average of the metric over
+# the player's seasons, the latest season weighing e times the one before,
+# plus the offset (as in predict.py).
+FORECASTS = {
+    'predicted_avg_runs': ('avg_runs', 5),
+    'predicted_strike_rate': ('strike_rate', 0),
+    'predicted_avg_wickets': ('avg_wickets', 0.3),
+    'predicted_economy_rate': ('economy_rate', 0)
+}
+
+# Forecasts of each role
+ROLE_FORECASTS = {
+    'batting': ['predicted_avg_runs', 'predicted_strike_rate'],
+    'bowling': ['predicted_avg_wickets', 'predicted_economy_rate']
+}
+
+def season_matrix(season_stats, columns, player_column='player'):
+    """
+    Pad the season rows of every player into (players, seasons, metrics)
+    arrays, right-aligned so that each player's latest season is in the last
+    column. Rows of a player must be in season order. Returns the player
+    labels, the values (NaN in the padding) and the number of seasons of
+    each player.
+    """
+    players, codes = np.unique(season_stats[player_column].astype(str).to_numpy(), return_inverse=True)
+    # Position of each row among its player's seasons, kept in row order
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes, minlength=len(players))
+    starts = np.r_[0, np.cumsum(counts)[:-1]]
+    position = np.empty(len(codes), dtype=np.int64)
+    position[order] = np.arange(len(codes)) - np.repeat(starts, counts)
+    
+    width = int(counts.max()) if len(counts) else 0
+    values = np.full((len(players), width, len(columns)), np.nan)
+    values[codes, width - counts[codes] + position] = season_stats[columns].to_numpy(dtype=float)
+    return players, values, counts
+
+def weighted_forecast(values):
+    """
+    Exponentially weighted average over the season axis (axis 1) of a padded
+    matrix, the last column weighing 1, the one before 1/e, ...; NaN cells
+    (padding or missing metrics) are left out
+    """
+    width = values.shape[1]
+    weights = np.exp(np.arange(width) - (width - 1.0))[None, :, None] * ~np.isnan(values)
+    with np.errstate(invalid='ignore'):
+        return np.nansum(values * weights, axis=1) / weights.sum(axis=1)
+
+def forecast_players(season_stats, through_season=None, forecasts=None, player_column='player'):
+    """
+    Next-season forecasts of every player in a season table (e.g. from
+    season_metrics.league_season_metrics), each player's rows in season
+    order. With through_season (a year or 'IPL2020'-style label) only the
+    seasons up to it are used. forecasts limits the FORECASTS columns
+    computed, e.g. ROLE_FORECASTS['batting'] for a table of batting metrics.
+    Returns one row per player with the number of seasons used, the last
+    season and the forecast columns.
+    """
+    forecasts = list(FORECASTS) if forecasts is None else list(forecasts)
+    if through_season is not None:
+        years = season_stats['season'].astype(str).str[-4:].astype(int)
+        season_stats = season_stats[(years <= int(str(through_season)[-4:])).to_numpy()]
+    columns = [FORECASTS[forecast][0] for forecast in forecasts]
+    players, values, counts = season_matrix(season_stats, columns, player_column)
+    predictions = weighted_forecast(values) + np.array([FORECASTS[forecast][1] for forecast in forecasts])
+    
+    last_seasons = season_stats.groupby(season_stats[player_column].astype(str), sort=True)['season'].last()
+    table = pd.DataFrame({
+        player_column: players,
+        'seasons': counts,
+        'last_season': last_seasons.reindex(players).astype(str).to_numpy()
+    })
+    for position, forecast in enumerate(forecasts):
+        table[forecast] = predictions[:, position]
+    return table
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Forecast the next season of every player in the league")
+    parser.add_argument('--through-season', default=None,
+                        help="forecast from the seasons up to this one, e.g. 2023 (default: all)")
+    parser.add_argument('--player', default=None,
+                        help="print the forecast of this player (e.g. \"SP Narine\") instead of writing the table")
+    parser.add_argument('--output', default='forecasts.csv',
+                        help="CSV file to write the table to")
+    args = parser.parse_args(argv)
+    
+    store = load_player_store()
+    if store is None:
+        store = build_player_store()
+    season_stats = league_season_metrics(store)
+    
+    start = time.perf_counter()
+    forecasts = forecast_players(season_stats, args.through_season)
+    print(f"Forecast {len(forecasts)} players in {(time.perf_counter() - start) * 1000:.1f}ms")
+    
+    if args.player is not None:
+        print(forecasts[forecasts['player'] == args.player].to_string(index=False))
+        return
+    forecasts.to_csv(args.output, index=False)
+    print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from forecast import FORECASTS
+from metrics import batting_strike_rate, bowling_economy, safe_divide
+from player_store import build_player_store, load_player_store
+
+# Prediction intervals of the next-season forecasts (see forecast.py) from a
+# bootstrap over per-match rows: every resample draws, for each player and
+# season, as many matches as the season had, with replacement, recomputes
+# the season metrics from the drawn matches and forecasts from them. The
+# interval of a forecast is the central `confidence` share of its resampled
+# values, so a player with one short season gets a wide interval and a long
+# career a narrow one.
+#
+# All resamples of all players are drawn as one array per chunk of
+# resamples; chunks are drawn until the resamples are done or the time
+# budget is spent.
+
+# Per-match counters the forecast metrics are computed from ('matches' is
+# 1 per row)
+COUNTERS = ['matches', 'total_runs', 'balls_played', 'wickets_taken', 'runs_conceded', 'balls_bowled']
+
+# Season metric -> function of the counter sums (columns in COUNTERS order),
+# as season_metrics.compute_season_metrics computes it
+METRICS = {
+    'avg_runs': lambda sums: safe_divide(sums[..., 1], sums[..., 0]),
+    'strike_rate': lambda sums: batting_strike_rate(sums[..., 1], sums[..., 2]),
+    'avg_wickets': lambda sums: safe_divide(sums[..., 3], sums[..., 0]),
+    'economy_rate': lambda sums: bowling_economy(sums[..., 4], sums[..., 5])
+}
+
+DEFAULT_RESAMPLES = 2000
+DEFAULT_CONFIDENCE = 0.9
+
+# Drawn values held in memory at once (resamples x rows x counters)
+CHUNK_ELEMENTS = 20_000_000
+
+def _season_groups(frame, by='player', sort=True):
+    """
+    Order the rows so that each player's seasons, and each season's rows,
+    are next to each other. Returns the row order, the start of every
+    (player, season) group and of every player in the ordered rows, and the
+    player and season of every group.
+    """
+    keys = [by, 'season'] if by is not None else ['season']
+    group_codes = frame.groupby(keys, sort=sort, observed=True).ngroup().to_numpy()
+    player_codes = pd.factorize(frame[by], sort=sort)[0] if by is not None else np.zeros(len(frame), dtype=np.int64)
+    order = np.lexsort((group_codes, player_codes))
+    
+    groups = group_codes[order]
+    group_starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    players = player_codes[order][group_starts]
+    player_starts = np.flatnonzero(np.r_[True, players[1:] != players[:-1]])
+    first_rows = order[group_starts]
+    player_labels = frame[by].astype(str).to_numpy()[first_rows] if by is not None else np.full(len(first_rows), '')
+    seasons = frame['season'].astype(str).to_numpy()[first_rows]
+    return order, group_starts, player_starts, player_labels, seasons
+
+def _forecast_sums(sums, group_weights, player_starts, player_weights, metrics, offsets):
+    """(..., players, metrics) forecasts from (..., groups, counters) counter sums"""
+    values = np.stack([METRICS[metric](sums) for metric in metrics], axis=-1)
+    weighted = np.add.reduceat(values * group_weights[:, None], player_starts, axis=-2)
+    return weighted / player_weights[:, None] + offsets
+
+def bootstrap_forecasts(frame, by='player', forecasts=None, n_resamples=DEFAULT_RESAMPLES,
+                        confidence=DEFAULT_CONFIDENCE, seed=None, time_budget=None, sort=True):
+    """
+    Forecasts with bootstrap prediction intervals of every player in
+    per-match rows (e.g. the player store frame, or one player's combined
+    season files with by=None). Each player's seasons are weighted in
+    season order (sort=True) or in the order they first appear (sort=False,
+    as predict.py does). forecasts limits the FORECASTS columns computed.
+    
+    seed makes the resamples reproducible: with the same seed the first k
+    resamples are always the same. time_budget (seconds) stops drawing once
+    another chunk of resamples would exceed it; at least one chunk is
+    always drawn. Returns the table, with a <forecast>_low and
+    <forecast>_high column after each forecast, and the number of resamples
+    drawn. A season of a single match cannot vary, so a one-match player
+    gets an interval of zero width.
+    """
+    start = time.perf_counter()
+    forecasts = list(FORECASTS) if forecasts is None else list(forecasts)
+    metrics = [FORECASTS[forecast][0] for forecast in forecasts]
+    offsets = np.array([FORECASTS[forecast][1] for forecast in forecasts], dtype=float)
+    
+    order, group_starts, player_starts, player_labels, seasons = _season_groups(frame, by, sort)
+    n_rows, n_groups = len(order), len(group_starts)
+    values = frame[COUNTERS[1:]].to_numpy(dtype=float)[order]
+    values = np.column_stack([np.ones(n_rows), values])
+    group_sizes = np.diff(np.r_[group_starts, n_rows])
+    
+    # Weights of the forecast.weighted_forecast average: a player's latest
+    # season weighs 1, the one before 1/e, ...
+    group_players = np.repeat(np.arange(len(player_starts)), np.diff(np.r_[player_starts, n_groups]))
+    seasons_of_player = np.diff(np.r_[player_starts, n_groups])
+    position = np.arange(n_groups) - player_starts[group_players]
+    group_weights = np.exp(position - (seasons_of_player[group_players] - 1.0))
+    player_weights = np.add.reduceat(group_weights, player_starts)
+    
+    point = _forecast_sums(np.add.reduceat(values, group_starts, axis=0), group_weights,
+                           player_starts, player_weights, metrics, offsets)
+    
+    # Every draw picks a row of its own (player, season) group
+    rng = np.random.default_rng(seed)
+    row_group_starts = np.repeat(group_starts, group_sizes)
+    row_group_sizes = np.repeat(group_sizes, group_sizes)
+    chunk = max(1, min(n_resamples, CHUNK_ELEMENTS // max(1, n_rows * len(COUNTERS))))
+    resampled = []
+    drawn = 0
+    while drawn < n_resamples:
+        size = min(chunk, n_resamples - drawn)
+        chunk_start = time.perf_counter()
+        draws = row_group_starts + rng.integers(0, row_group_sizes, size=(size, n_rows))
+        sums = np.add.reduceat(values[draws], group_starts, axis=1)
+        resampled.append(_forecast_sums(sums, group_weights, player_starts, player_weights, metrics, offsets))
+        drawn += size
+        now = time.perf_counter()
+        if time_budget is not None and now - start + (now - chunk_start) > time_budget:
+            break
+    resampled = np.concatenate(resampled, axis=0)
+    
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(resampled, [tail, 100 - tail], axis=0)
+    table = pd.DataFrame({
+        by or 'player': player_labels[player_starts],
+        'seasons': seasons_of_player,
+        'last_season': seasons[np.r_[player_starts[1:], n_groups] - 1]
+    })
+    for position, forecast in enumerate(forecasts):
+        table[forecast] = point[:, position]
+        table[f"{forecast}_low"] = low[:, position]
+        table[f"{forecast}_high"] = high[:, position]
+    return table, drawn
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bootstrap prediction intervals of every player's next-season forecasts")
+    parser.add_argument('--resamples', type=int, default=DEFAULT_RESAMPLES,
+                        help="bootstrap resamples")
+    parser.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE,
+                        help="share of the resampled forecasts inside the interval")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="random seed, for reproducible intervals")
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help="seconds to spend resampling at most (default: draw every resample)")
+    parser.add_argument('--player', default=None,
+                        help="print the forecasts of this player (e.g. \"SP Narine\") instead of writing the table")
+    parser.add_argument('--output', default='forecast_intervals.csv',
+                        help="CSV file to write the table to")
+    args = parser.parse_args(argv)
+    
+    store = load_player_store()
+    if store is None:
+        store = build_player_store()
+    
+    start = time.perf_counter()
+    table, drawn = bootstrap_forecasts(store['frame'], n_resamples=args.resamples, confidence=args.confidence,
+                                       seed=args.seed, time_budget=args.time_budget)
+    print(f"Drew {drawn} resamples of {len(table)} players in {time.perf_counter() - start:.2f}s")
+    
+    if args.player is not None:
+        print(table[table['player'] == args.player].T.to_string(header=False))
+        return
+    table.to_csv(args.output, index=False)
+    print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
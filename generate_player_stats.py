@@ -1,9 +1,62 @@
+import argparse
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
+import player_index
+from batting_order import build_batting_order
+from deliveries_cache import find_season_files, load_deliveries, read_deliveries, season_name
+from metrics import batting_strike_rate, bowling_economy
 input_filename = 'IPL2024.csv'  #Enter the CSV file of your choice to capture the player stats
-deliveries = pd.read_csv(input_filename)
+deliveries = None  # Loaded by load_season()
+season_index = None  # Player index of the loaded season, see player_index.py
+season_batting_order = None  # Batting positions by (match_id, inning, player), see batting_order.py
+
+def load_season(filename):
+    """Load the deliveries of a season, and its player index, as the module's working dataset"""
+    global input_filename, deliveries, season_index, season_batting_order
+    input_filename = filename
+    deliveries = load_deliveries(filename)
+    season_index = player_index.load_player_index(filename, deliveries)
+    season_batting_order = None
+    return deliveries
+
+def batting_position(match_id, inning, player_name):
+    """Batting position of a player in an innings of the loaded season"""
+    global season_batting_order
+    if season_batting_order is None:
+        season_batting_order = build_batting_order(deliveries).set_index(
+            ['match_id', 'inning', 'player']
+        )['position']
+    return int(season_batting_order.loc[(match_id, inning, player_name)])
+
+# Column order of the per-player statistics CSVs
+columns_order = [
+    'match_id',
+    'opponent_team',
+    'batting_team',
+    'bowling_team',
+    'batting_position',
+    'total_runs',
+    'balls_played',
+    'balls_bowled',
+    'dot_balls',
+    'wickets_taken',
+    'dismissed',
+    'dismissal_kind',
+    'fours',
+    'sixes',
+    'batting_strike_rate',
+    'bowling_economy',
+    'runs_conceded'
+]
 
 def player_exists(player_name):
     """Check if player exists in the dataset"""
+    if season_index is not None:
+        return player_index.player_in_roles(season_index, player_name, ('batter', 'bowler'))
     return (
         (deliveries['batter'] == player_name).any() or 
         (deliveries['bowler'] == player_name).any()
@@ -14,18 +67,24 @@ def get_player_match_stats(player_name):
     if not player_exists(player_name):
         print(f"Player '{player_name}' not found in the dataset.")
         return None
-        
+    
     # Get unique match IDs for the player
-    player_matches = deliveries[
-        (deliveries['batter'] == player_name) | 
-        (deliveries['bowler'] == player_name)
-    ]['match_id'].unique()
+    if season_index is not None:
+        player_matches = player_index.player_matches(season_index, player_name, ('batter', 'bowler'))
+    else:
+        player_matches = deliveries[
+            (deliveries['batter'] == player_name) | 
+            (deliveries['bowler'] == player_name)
+        ]['match_id'].unique()
     
     match_stats_list = []
     
     for match_id in player_matches:
         # Filter data for specific match
-        match_data = deliveries[deliveries['match_id'] == match_id]
+        if season_index is not None:
+            match_data = player_index.match_slice(deliveries, season_index, match_id)
+        else:
+            match_data = deliveries[deliveries['match_id'] == match_id]
         
         # Initialize match stats dictionary
         match_stats = {
@@ -54,12 +113,10 @@ def get_player_match_stats(player_name):
             match_stats['batting_team'] = batting_data['batting_team'].iloc[0]
             match_stats['opponent_team'] = batting_data['bowling_team'].iloc[0]
             
-            # Calculate batting position
-            innings_data = match_data[match_data['batting_team'] == match_stats['batting_team']]
-            batters_before = innings_data[
-                innings_data.index < batting_data.index.min()
-            ]['batter'].unique()
-            match_stats['batting_position'] = len(batters_before) + 1
+            # Batting position from the season's batting order table
+            match_stats['batting_position'] = batting_position(
+                match_id, batting_data['inning'].iloc[0], player_name
+            )
             
             # Count only actual runs (excluding leg byes and byes)
             valid_runs = batting_data[
@@ -78,8 +135,7 @@ def get_player_match_stats(player_name):
             match_stats['sixes'] = len(valid_runs[valid_runs['batsman_runs'] == 6])
             
             # Calculate batting strike rate
-            if match_stats['balls_played'] > 0:
-                match_stats['batting_strike_rate'] = round((match_stats['total_runs'] / match_stats['balls_played']) * 100, 2)
+            match_stats['batting_strike_rate'] = round(batting_strike_rate(match_stats['total_runs'], match_stats['balls_played']), 2)
         
         # Bowling statistics for the match
         bowling_data = match_data[match_data['bowler'] == player_name]
@@ -116,9 +172,7 @@ def get_player_match_stats(player_name):
             match_stats['runs_conceded'] = runs_conceded
             
             # Calculate bowling economy
-            overs_bowled = match_stats['balls_bowled'] / 6
-            if overs_bowled > 0:
-                match_stats['bowling_economy'] = round(match_stats['runs_conceded'] / overs_bowled, 2)
+            match_stats['bowling_economy'] = round(bowling_economy(match_stats['runs_conceded'], match_stats['balls_bowled']), 2)
         
         # Check if player was dismissed in this match
         dismissal_data = match_data[match_data['player_dismissed'] == player_name]
@@ -130,6 +184,135 @@ def get_player_match_stats(player_name):
     
     return match_stats_list
 
+def get_season_match_stats(season_deliveries=None):
+    """
+    Build the per-match statistics of every player in a season with one
+    grouped pass over the deliveries.
+    
+    Returns a DataFrame with a 'player' column followed by the same columns
+    that generate_player_stats_csv writes, in the same row order as
+    get_player_match_stats would produce for each player.
+    """
+    if season_deliveries is None:
+        season_deliveries = deliveries
+    df = season_deliveries.reset_index(drop=True)
+    
+    # Name columns may be dictionary-encoded (see deliveries_cache); the
+    # output uses plain strings so frames from different seasons line up
+    name_columns = ['batting_team', 'bowling_team', 'batter', 'bowler',
+                    'player_dismissed', 'dismissal_kind']
+    df = df.astype({
+        column: object for column in name_columns
+        if isinstance(df[column].dtype, pd.CategoricalDtype)
+    })
+    
+    # Per-delivery flags shared by the batting and bowling aggregations
+    row = pd.Series(range(len(df)), index=df.index)
+    legal_ball = ~df['extras_type'].isin(['wides', 'noballs'])
+    off_bat = ~df['extras_type'].isin(['legbyes', 'byes'])
+    bat_runs = df['batsman_runs'].where(off_bat, 0)
+    flags = pd.DataFrame({
+        'match_id': df['match_id'],
+        'batter': df['batter'],
+        'bowler': df['bowler'],
+        'inning': df['inning'],
+        'batting_team': df['batting_team'],
+        'bowling_team': df['bowling_team'],
+        'row': row,
+        'bat_runs': bat_runs,
+        'legal_ball': legal_ball.astype(int),
+        'four': (off_bat & (df['batsman_runs'] == 4)).astype(int),
+        'six': (off_bat & (df['batsman_runs'] == 6)).astype(int),
+        'dot_ball': ((df['batsman_runs'] == 0) & df['extras_type'].isna()).astype(int),
+        'wicket': ((df['is_wicket'] == 1) & (df['dismissal_kind'] != 'run out')).astype(int),
+        'conceded': df['total_runs'].where(off_bat, 0),
+    })
+    
+    # Batting statistics for every (match, batter)
+    batting = flags.groupby(['match_id', 'batter'], sort=False).agg(
+        inning=('inning', 'first'),
+        batting_team=('batting_team', 'first'),
+        bat_opponent=('bowling_team', 'first'),
+        first_row=('row', 'min'),
+        total_runs=('bat_runs', 'sum'),
+        balls_played=('legal_ball', 'sum'),
+        fours=('four', 'sum'),
+        sixes=('six', 'sum'),
+    ).reset_index().rename(columns={'batter': 'player'})
+    
+    # Batting position of the innings the player first batted in
+    batting = batting.merge(
+        build_batting_order(df).rename(columns={'position': 'batting_position'}),
+        on=['match_id', 'inning', 'player'], how='left'
+    )
+    
+    # Bowling statistics for every (match, bowler)
+    bowling = flags.groupby(['match_id', 'bowler'], sort=False).agg(
+        bowling_team=('bowling_team', 'first'),
+        bowl_opponent=('batting_team', 'first'),
+        bowl_first_row=('row', 'min'),
+        balls_bowled=('legal_ball', 'sum'),
+        dot_balls=('dot_ball', 'sum'),
+        wickets_taken=('wicket', 'sum'),
+        runs_conceded=('conceded', 'sum'),
+    ).reset_index().rename(columns={'bowler': 'player'})
+    
+    # First dismissal of every player in each match
+    dismissals = df[df['player_dismissed'].notna()].groupby(
+        ['match_id', 'player_dismissed'], sort=False
+    )['dismissal_kind'].first().reset_index().rename(
+        columns={'player_dismissed': 'player'}
+    )
+    dismissals['dismissed'] = True
+    
+    stats = batting.merge(bowling, on=['match_id', 'player'], how='outer')
+    stats = stats.merge(dismissals, on=['match_id', 'player'], how='left')
+    
+    batted = stats['first_row'].notna()
+    bowled = stats['bowl_first_row'].notna()
+    stats['batting_team'] = stats['batting_team'].where(batted, '')
+    stats['bowling_team'] = stats['bowling_team'].where(bowled, '')
+    stats['opponent_team'] = stats['bat_opponent'].where(batted, stats['bowl_opponent'])
+    stats['dismissed'] = stats['dismissed'].fillna(False).astype(bool)
+    stats['dismissal_kind'] = stats['dismissal_kind'].where(stats['dismissed'], None)
+    
+    counters = [
+        'batting_position', 'total_runs', 'balls_played', 'fours', 'sixes',
+        'balls_bowled', 'dot_balls', 'wickets_taken', 'runs_conceded'
+    ]
+    stats[counters] = stats[counters].fillna(0).astype(int)
+    
+    # Derived rates, zero when no legitimate balls were faced or bowled
+    stats['batting_strike_rate'] = batting_strike_rate(stats['total_runs'], stats['balls_played']).round(2)
+    stats['bowling_economy'] = bowling_economy(stats['runs_conceded'], stats['balls_bowled']).round(2)
+    
+    # Matches in the order the player first appears in them
+    stats['order'] = stats[['first_row', 'bowl_first_row']].min(axis=1)
+    stats = stats.sort_values(['player', 'order'], kind='stable')
+    
+    return stats[['player'] + columns_order].reset_index(drop=True)
+
+def generate_season_stats_csv(player_names=None):
+    """
+    Write the statistics CSV of every player in the season (or only of
+    player_names) from a single grouped pass over the deliveries.
+    """
+    season_stats = get_season_match_stats()
+    if player_names is not None:
+        missing = set(player_names) - set(season_stats['player'])
+        for player_name in player_names:
+            if player_name in missing:
+                print(f"Skipping {player_name} - Player not found in the dataset")
+        season_stats = season_stats[season_stats['player'].isin(player_names)]
+    
+    base_input_filename = os.path.basename(input_filename).replace('.csv', '')
+    for player_name, df in season_stats.groupby('player', sort=False):
+        output_filename = f"{player_name.replace(' ', '_')}_{base_input_filename}.csv"
+        df[columns_order].to_csv(output_filename, index=False)
+        print(f"Statistics saved to {output_filename}")
+    
+    return season_stats
+
 def generate_player_stats_csv(player_name):
     # Get the match statistics
     match_stats_list = get_player_match_stats(player_name)
@@ -137,30 +320,11 @@ def generate_player_stats_csv(player_name):
     # If player doesn't exist, return None
     if match_stats_list is None:
         return None
-        
+    
     # Convert the list of dictionaries to a DataFrame
     df = pd.DataFrame(match_stats_list)
     
     # Reorder columns to have match_id and opponent_team first
-    columns_order = [
-        'match_id',
-        'opponent_team',
-        'batting_team',
-        'bowling_team',
-        'batting_position',
-        'total_runs',
-        'balls_played',
-        'balls_bowled',
-        'dot_balls',
-        'wickets_taken',
-        'dismissed',
-        'dismissal_kind',
-        'fours',
-        'sixes',
-        'batting_strike_rate',
-        'bowling_economy',
-        'runs_conceded'
-    ]
     df = df[columns_order]
     
     # Generate CSV filename
@@ -172,6 +336,161 @@ def generate_player_stats_csv(player_name):
     
     return df
 
+def write_season_outputs(season_stats, season, output_folder='players', append=False):
+    """
+    Write one CSV per player (players/<Player_Name>/<Player_Name>_<season>.csv)
+    and the season-wide table (players/<season>_all_players.csv).
+    With append=True the rows are added to the existing files instead.
+    """
+    def write(df, output_file):
+        if append and os.path.exists(output_file):
+            df.to_csv(output_file, mode='a', header=False, index=False)
+        else:
+            df.to_csv(output_file, index=False)
+    
+    os.makedirs(output_folder, exist_ok=True)
+    for player_name, df in season_stats.groupby('player', sort=False):
+        file_name = player_name.replace(' ', '_')
+        player_folder = os.path.join(output_folder, file_name)
+        os.makedirs(player_folder, exist_ok=True)
+        write(df[columns_order], os.path.join(player_folder, f"{file_name}_{season}.csv"))
+    write(season_stats, os.path.join(output_folder, f"{season}_all_players.csv"))
+
+def manifest_path(season, output_folder='players'):
+    """Manifest of the matches already written for a season"""
+    return os.path.join(output_folder, '.manifest', f"{season}.json")
+
+def read_manifest(season, output_folder='players'):
+    path = manifest_path(season, output_folder)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def write_manifest(season, output_folder, match_ids, header, byte_offset):
+    """
+    Record the processed match_ids of a season together with the source
+    file's header and the byte offset up to which it has been read.
+    """
+    path = manifest_path(season, output_folder)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({
+            'season': season,
+            'header': header,
+            'byte_offset': byte_offset,
+            'match_ids': [int(match_id) for match_id in match_ids]
+        }, f)
+
+def _read_source_tail(csv_file, byte_offset):
+    """Return (header line, bytes after byte_offset, new byte offset)"""
+    with open(csv_file, 'rb') as f:
+        header = f.readline()
+        f.seek(max(byte_offset, len(header)))
+        tail = f.read()
+    return header, tail, max(byte_offset, len(header)) + len(tail)
+
+def process_season(csv_file, output_folder='players'):
+    """
+    Generate the statistics of every player in one season file.
+    Returns (season, number of players, wall time in seconds).
+    """
+    start = time.perf_counter()
+    season = season_name(csv_file)
+    header, _, byte_offset = _read_source_tail(csv_file, 0)
+    season_deliveries = load_deliveries(csv_file)
+    season_stats = get_season_match_stats(season_deliveries)
+    write_season_outputs(season_stats, season, output_folder)
+    write_manifest(season, output_folder, season_deliveries['match_id'].unique(),
+                   header.decode(), byte_offset)
+    return season, season_stats['player'].nunique(), time.perf_counter() - start
+
+def _refresh_player_store(csv_file, output_folder):
+    """Bring the season's rows in the output folder's player store (if any) up to date"""
+    # Imported here: player_store builds on this module
+    from player_store import STORE_FILE, update_store_season
+    update_store_season(csv_file, os.path.join(output_folder, os.path.basename(STORE_FILE)))
+
+def update_season(csv_file, output_folder='players'):
+    """
+    Incrementally update a season's outputs with the matches appended to its
+    file since the last run. Only the unread tail of the file is parsed, and
+    the new rows are appended to the per-player and season-wide CSVs.
+    Falls back to a full rebuild when there is no manifest yet or the file
+    was rewritten rather than appended to. The season's rows in the player
+    store of the output folder are refreshed too (see player_store.py).
+    Returns (season, number of new matches, number of new deliveries, wall time).
+    """
+    start = time.perf_counter()
+    season = season_name(csv_file)
+    manifest = read_manifest(season, output_folder)
+    
+    rebuild_reason = None
+    if manifest is None:
+        rebuild_reason = "no manifest"
+    else:
+        header, tail, byte_offset = _read_source_tail(csv_file, manifest['byte_offset'])
+        if header.decode() != manifest['header'] or os.path.getsize(csv_file) < manifest['byte_offset']:
+            rebuild_reason = "source file was rewritten"
+    
+    if rebuild_reason is None and tail:
+        new_deliveries = read_deliveries(io.BytesIO(header + tail))
+        processed = set(manifest['match_ids'])
+        if new_deliveries['match_id'].isin(processed).any():
+            # More deliveries of an already written match: its rows are stale
+            rebuild_reason = "deliveries appended to an already processed match"
+    
+    if rebuild_reason is not None:
+        print(f"{season}: full rebuild ({rebuild_reason})")
+        process_season(csv_file, output_folder)
+        _refresh_player_store(csv_file, output_folder)
+        match_count = len(read_manifest(season, output_folder)['match_ids'])
+        return season, match_count, None, time.perf_counter() - start
+    
+    if not tail:
+        return season, 0, 0, time.perf_counter() - start
+    
+    new_match_ids = new_deliveries['match_id'].unique()
+    season_stats = get_season_match_stats(new_deliveries)
+    write_season_outputs(season_stats, season, output_folder, append=True)
+    write_manifest(season, output_folder, list(manifest['match_ids']) + list(new_match_ids),
+                   manifest['header'], byte_offset)
+    _refresh_player_store(csv_file, output_folder)
+    return season, len(new_match_ids), len(new_deliveries), time.perf_counter() - start
+
+def process_all_seasons(dataset_folder='IPL_dataset', output_folder='players', max_workers=None):
+    """
+    Process every season in the dataset folder in parallel, one season per
+    worker process. Uses one worker per CPU core unless max_workers is given.
+    """
+    season_files = find_season_files(dataset_folder)
+    if not season_files:
+        print(f"No IPL*.csv files found in {dataset_folder}")
+        return []
+    
+    max_workers = max_workers or os.cpu_count() or 1
+    print(f"Processing {len(season_files)} seasons on {max_workers} worker(s)...")
+    
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(process_season, csv_file, output_folder): csv_file
+            for csv_file in season_files
+        }
+        for future in as_completed(futures):
+            csv_file = futures[future]
+            try:
+                season, player_count, elapsed = future.result()
+            except Exception as e:
+                print(f"Error processing {csv_file}: {str(e)}")
+                continue
+            print(f"{season}: {player_count} players in {elapsed:.2f}s")
+            results.append((season, player_count, elapsed))
+    
+    print(f"Processed {len(results)} seasons in {time.perf_counter() - start:.2f}s")
+    return sorted(results)
+
 def process_player(player_name):
     """Process a single player with error handling"""
     print(f"\nProcessing statistics for {player_name}...")
@@ -187,7 +506,7 @@ def process_player(player_name):
     return stats_df
 
 # Example usage with multiple players
-def main():
+def main(argv=None):
     player_names =players = [
     "SP Narine", 
     "RD Gaikwad", 
@@ -204,6 +523,45 @@ def main():
     # continue with the list of players you want to get seasonal stats 
 ]
      # Add or modify player names as needed
+    parser = argparse.ArgumentParser(description="Generate per-match player statistics for a season")
+    parser.add_argument('--input', default=input_filename,
+                        help="ball-by-ball CSV of the season to process")
+    parser.add_argument('--all', action='store_true',
+                        help="write statistics for every player in the season in a single pass")
+    parser.add_argument('--batch', action='store_true',
+                        help="process every IPL*.csv in the dataset folder in parallel")
+    parser.add_argument('--dataset-folder', default='IPL_dataset',
+                        help="folder containing the IPL*.csv season files (with --batch)")
+    parser.add_argument('--output-folder', default='players',
+                        help="folder to write the per-player CSVs to (with --batch or --update)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="number of worker processes (default: one per CPU core)")
+    parser.add_argument('--update', action='store_true',
+                        help="only process matches appended since the last run "
+                             "(of --input, or of every season with --batch)")
+    args = parser.parse_args(argv)
+    
+    if args.update:
+        season_files = find_season_files(args.dataset_folder) if args.batch else [args.input]
+        for csv_file in season_files:
+            season, match_count, delivery_count, elapsed = update_season(csv_file, args.output_folder)
+            if delivery_count is None:
+                print(f"{season}: rebuilt {match_count} matches in {elapsed:.2f}s")
+            elif match_count:
+                print(f"{season}: added {match_count} matches ({delivery_count} deliveries) in {elapsed:.2f}s")
+            else:
+                print(f"{season}: up to date")
+        return
+    
+    if args.batch:
+        process_all_seasons(args.dataset_folder, args.output_folder, args.workers)
+        return
+    
+    load_season(args.input)
+    if args.all:
+        generate_season_stats_csv()
+        return
+    
     for player_name in player_names:
         process_player(player_name)
 
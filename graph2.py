@@ -1,26 +1,69 @@
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
-import seaborn as sns
+import plotting
 import os  # Import os module to handle file paths
+from match_dimension import order_by_date
+from metrics import dot_ball_percentage
+from output_profiles import PROFILES, output_files, save_dashboard
+from render_cache import is_render_current, record_render, render_key
+from rolling_form import DEFAULT_HALF_LIFE, DEFAULT_WINDOW, FORM_INPUTS, rolling_form
 
-def create_bowler_dashboard(csv_file, player_name):
-    # Read the CSV file
-    df = pd.read_csv(csv_file)
+# Legend label of the rolling-form lines
+FORM_LABEL = f'Form (last {DEFAULT_WINDOW} innings)'
+
+# The four panels of the bowler dashboard:
+# (column, colour, title, y label, average label, average text suffix, form column)
+BOWLER_PANELS = [
+    ('bowling_economy', 'orange', 'Economy per Innings', 'Economy', 'Average Economy', '', 'form_economy'),
+    ('wickets_taken', 'green', 'Wickets per Innings', 'Wickets', 'Average Wickets', '', 'form_wickets'),
+    ('dot_ball_percentage', 'blue', 'Dot Balls Percentage', 'Dot Balls %', 'Average Dot Balls %', '%',
+     'form_dot_ball_percentage'),
+    ('balls_bowled', 'red', 'Balls Bowled per Innings', 'Balls Bowled', 'Average Balls Bowled', '', 'form_balls_bowled')
+]
+
+def _bowler_dashboard_output(csv_file, df, player_name, reuse_figure=False):
+    """
+    Full resolution image path of a bowler dashboard and its render cache
+    key. Renders into a reused figure are laid out (and sized) differently,
+    so reuse_figure is part of the key.
+    """
+    # Ensure the "bowler" folder exists
+    output_folder = "bowler"
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+    output_file = os.path.join(output_folder, os.path.basename(csv_file).replace('.csv', '_dashboard.png'))
+    plotted = ['bowling_economy', 'wickets_taken', 'dot_balls', 'balls_bowled']
+    key = render_key('bowler_dashboard', df[list(dict.fromkeys(plotted + FORM_INPUTS))],
+                     title=player_name, reuse_figure=reuse_figure,
+                     form_window=DEFAULT_WINDOW, form_half_life=DEFAULT_HALF_LIFE)
+    return output_file, key
+
+def create_bowler_dashboard(csv_file, player_name, force=False, profile='full'):
+    # Read the CSV file, innings in the order they were played
+    df = order_by_date(pd.read_csv(csv_file)).reset_index(drop=True)
+    
+    # Skip the render when the plotted metrics and layout are unchanged
+    full_file, key = _bowler_dashboard_output(csv_file, df, player_name)
+    output_file = output_files(full_file, profile)[0]
+    if not force and is_render_current(output_file, key):
+        return output_file
     
     # Add a new column 'serial_order' to replace 'match_id'
     df['serial_order'] = range(1, len(df) + 1)
     
     # Set style for better visualization
-    plt.style.use('default')  # Changed from 'seaborn' to 'default'
-    sns.set_theme()  # This will apply seaborn styling
+    plotting.apply_theme('darkgrid')
     
     # Create figure and subplots
     fig = plt.figure(figsize=(15, 12))
     fig.suptitle(f"{player_name} Performance Analysis", fontsize=16, y=0.95)
+    form = rolling_form(df)
     
     # 1. Economy: bowling_economy vs match_id
     ax1 = plt.subplot(2, 2, 1)
-    sns.lineplot(data=df, x='serial_order', y='bowling_economy', color='orange', marker='o', ax=ax1)
+    plotting.lineplot(ax1, df, 'serial_order', 'bowling_economy', color='orange')
+    plotting.formline(ax1, df['serial_order'], form['form_economy'], FORM_LABEL)
     avg_economy = df['bowling_economy'].mean()
     ax1.axhline(y=avg_economy, color='gray', linestyle=':', label='Average Economy')
     ax1.text(0.5, avg_economy, f'Avg: {avg_economy:.2f}', color='gray', ha='center', va='bottom')
@@ -31,7 +74,8 @@ def create_bowler_dashboard(csv_file, player_name):
     
     # 2. Wickets per innings: wickets_taken vs match_id
     ax2 = plt.subplot(2, 2, 2)
-    sns.lineplot(data=df, x='serial_order', y='wickets_taken', color='green', marker='o', ax=ax2)
+    plotting.lineplot(ax2, df, 'serial_order', 'wickets_taken', color='green')
+    plotting.formline(ax2, df['serial_order'], form['form_wickets'], FORM_LABEL)
     avg_wickets = df['wickets_taken'].mean()
     ax2.axhline(y=avg_wickets, color='gray', linestyle=':', label='Average Wickets')
     ax2.text(0.5, avg_wickets, f'Avg: {avg_wickets:.2f}', color='gray', ha='center', va='bottom')
@@ -41,12 +85,13 @@ def create_bowler_dashboard(csv_file, player_name):
     ax2.legend()
     
     # 3. Dot balls % = dot_balls * 100 / balls_bowled
-    df['dot_balls_percentage'] = (df['dot_balls'] * 100 / df['balls_bowled']).fillna(0)
+    df['dot_ball_percentage'] = dot_ball_percentage(df['dot_balls'], df['balls_bowled'])
     ax3 = plt.subplot(2, 2, 3)
-    sns.lineplot(data=df, x='serial_order', y='dot_balls_percentage', color='blue', marker='o', ax=ax3)
-    avg_dot_balls_percentage = df['dot_balls_percentage'].mean()
-    ax3.axhline(y=avg_dot_balls_percentage, color='gray', linestyle=':', label='Average Dot Balls %')
-    ax3.text(0.5, avg_dot_balls_percentage, f'Avg: {avg_dot_balls_percentage:.2f}%', color='gray', ha='center', va='bottom')
+    plotting.lineplot(ax3, df, 'serial_order', 'dot_ball_percentage', color='blue')
+    plotting.formline(ax3, df['serial_order'], form['form_dot_ball_percentage'], FORM_LABEL)
+    avg_dot_ball_percentage = df['dot_ball_percentage'].mean()
+    ax3.axhline(y=avg_dot_ball_percentage, color='gray', linestyle=':', label='Average Dot Balls %')
+    ax3.text(0.5, avg_dot_ball_percentage, f'Avg: {avg_dot_ball_percentage:.2f}%', color='gray', ha='center', va='bottom')
     ax3.set_title('Dot Balls Percentage')
     ax3.set_xlabel('Match No')
     ax3.set_ylabel('Dot Balls %')
@@ -54,7 +99,8 @@ def create_bowler_dashboard(csv_file, player_name):
     
     # 4. Balls bowled (inning wise) = balls_bowled vs match_id
     ax4 = plt.subplot(2, 2, 4)
-    sns.lineplot(data=df, x='serial_order', y='balls_bowled', color='red', marker='o', ax=ax4)
+    plotting.lineplot(ax4, df, 'serial_order', 'balls_bowled', color='red')
+    plotting.formline(ax4, df['serial_order'], form['form_balls_bowled'], FORM_LABEL)
     avg_balls_bowled = df['balls_bowled'].mean()
     ax4.axhline(y=avg_balls_bowled, color='gray', linestyle=':', label='Average Balls Bowled')
     ax4.text(0.5, avg_balls_bowled, f'Avg: {avg_balls_bowled:.2f}', color='gray', ha='center', va='bottom')
@@ -66,33 +112,110 @@ def create_bowler_dashboard(csv_file, player_name):
     # Adjust layout
     plt.tight_layout()
     
-    # Ensure the "bowler" folder exists
-    output_folder = "bowler"
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
-    
-    # Save the dashboard with the same name as the input file but with a .png extension in the "bowler" folder
-    output_file = os.path.join(output_folder, csv_file.replace('.csv', '_dashboard.png'))
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    # Save the dashboard with the same name as the input file in the "bowler" folder,
+    # in the format and resolution of the requested output profile
+    save_dashboard(fig, full_file, profile)
     plt.close()
+    record_render(output_file, key)
     
     return output_file
 
-def process_multiple_files(csv_files):
+def build_bowler_dashboard_template():
+    """
+    Build the bowler dashboard figure once for bulk rendering: the figure,
+    its four axes, titles, labels, legends and empty line/average artists
+    that render_bowler_dashboard fills in for each season.
+    """
+    # Set style for better visualization
+    plotting.apply_theme('darkgrid')
+    
+    fig = plt.figure(figsize=(15, 12))
+    suptitle = fig.suptitle('', fontsize=16, y=0.95)
+    panels = []
+    for position, (column, color, title, ylabel, avg_label, suffix, form_column) in enumerate(BOWLER_PANELS, start=1):
+        ax = plt.subplot(2, 2, position)
+        # Same look as sns.lineplot with marker='o'
+        line, = ax.plot([], [], color=color, marker='o', markeredgecolor='white', markeredgewidth=0.75)
+        form_line, = ax.plot([], [], color='dimgray', linestyle='--', linewidth=1.5, label=FORM_LABEL)
+        avg_line = ax.axhline(y=0, color='gray', linestyle=':', label=avg_label)
+        avg_text = ax.text(0.5, 0, '', color='gray', ha='center', va='bottom')
+        ax.set_title(title)
+        ax.set_xlabel('Match No')
+        ax.set_ylabel(ylabel)
+        ax.legend()
+        panels.append({'column': column, 'suffix': suffix, 'form_column': form_column, 'ax': ax, 'line': line,
+                       'form_line': form_line, 'avg_line': avg_line, 'avg_text': avg_text})
+    
+    # The layout and the tight bounding box are computed on the first render
+    return {'fig': fig, 'suptitle': suptitle, 'panels': panels, 'bbox': None}
+
+def render_bowler_dashboard(template, df, player_name, output_file, profile='full'):
+    """
+    Swap one season's data into a dashboard template and save it with an
+    output profile (output_file being the full resolution image path)
+    """
+    df = df.copy()
+    df['serial_order'] = range(1, len(df) + 1)
+    df['dot_ball_percentage'] = dot_ball_percentage(df['dot_balls'], df['balls_bowled'])
+    form = rolling_form(df)
+    
+    template['suptitle'].set_text(f"{player_name} Performance Analysis")
+    for panel in template['panels']:
+        values = df[panel['column']]
+        average = values.mean()
+        panel['line'].set_data(df['serial_order'], values)
+        shown = form[panel['form_column']].notna()
+        panel['form_line'].set_data(df['serial_order'][shown], form[panel['form_column']][shown])
+        panel['avg_line'].set_ydata([average, average])
+        panel['avg_text'].set_position((0.5, average))
+        panel['avg_text'].set_text(f"Avg: {average:.2f}{panel['suffix']}")
+        panel['ax'].relim()
+        panel['ax'].autoscale_view()
+    
+    fig = template['fig']
+    if template['bbox'] is None:
+        fig.tight_layout()
+        # Like bbox_inches='tight', with some extra padding since tick and
+        # average labels of later dashboards may be a little wider
+        template['bbox'] = fig.get_tightbbox(fig.canvas.get_renderer()).padded(0.25)
+    return save_dashboard(fig, output_file, profile, bbox_inches=template['bbox'])
+
+def process_multiple_files(csv_files, reuse_figure=False, profile='full'):
+    """
+    Create the bowler dashboard of every file. With reuse_figure=True the
+    figure is built and laid out once and only the data is swapped per
+    dashboard, which is much faster for long batches. profile selects the
+    output images, see output_profiles.py.
+    """
+    template = None
     for csv_file in csv_files:
         # Extract player name and year from filename
-        player_name = csv_file.split('_')[0]  # Assuming filename format: "PlayerName_Year.csv"
-        year = csv_file.split('_')[1].split('.')[0]  # Extract the year part
+        file_name = os.path.basename(csv_file)
+        player_name = file_name.split('_')[0]  # Assuming filename format: "PlayerName_Year.csv"
+        year = file_name.split('_')[1].split('.')[0]  # Extract the year part
         player_surname = player_name.split(' ')[-1]  # Extract the surname
         full_title = f"{player_surname} {year}"
         
         try:
             # Create matplotlib dashboard
-            dashboard_file = create_bowler_dashboard(csv_file, full_title)
+            if reuse_figure:
+                df = order_by_date(pd.read_csv(csv_file)).reset_index(drop=True)
+                full_file, key = _bowler_dashboard_output(csv_file, df, full_title, reuse_figure=True)
+                dashboard_file = output_files(full_file, profile)[0]
+                if not is_render_current(dashboard_file, key):
+                    if template is None:
+                        template = build_bowler_dashboard_template()
+                    render_bowler_dashboard(template, df, full_title, full_file, profile)
+                    record_render(dashboard_file, key)
+            else:
+                dashboard_file = create_bowler_dashboard(csv_file, full_title, profile=profile)
             print(f"Created dashboard for {full_title}: {dashboard_file}")
-            
+        
         except Exception as e:
             print(f"Error processing {csv_file}: {str(e)}")
+    
+    if template is not None:
+        plt.close(template['fig'])
 
 # List your CSV files
 csv_files =[
@@ -111,6 +234,18 @@ csv_files =[
     "SP_Narine_IPL2024.csv"
 ]
 
-# Process all files
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create the bowler dashboard of each season file")
+    parser.add_argument('files', nargs='*', default=csv_files,
+                        help="per-player season CSVs (default: the files listed above)")
+    parser.add_argument('--reuse-figure', action='store_true',
+                        help="build the figure once and only swap the data per dashboard")
+    parser.add_argument('--profile', default='full', choices=list(PROFILES),
+                        help="output images to write, see output_profiles.py")
+    args = parser.parse_args(argv)
+    
+    # Process all files
+    process_multiple_files(args.files, reuse_figure=args.reuse_figure, profile=args.profile)
+
 if __name__ == "__main__":
-    process_multiple_files(csv_files)
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,87 @@
+# IPL player analysis: per-match player statistics, dashboards and season
+# predictions. The compute functions of the analysis scripts can be imported
+# from this package without side effects, e.g.
+#
+#     from ipl_analysis import load_deliveries, get_season_match_stats
+#
+# Each name is imported from its script on first use, so importing the
+# package is cheap and pandas/matplotlib are only loaded by the functions
+# that need them. The command line interface is in cli.py
+# (python -m ipl_analysis --help).
+#
+# The scripts are top-level modules of the repository, not part of this
+# package: the package is a façade that only works with the repository root
+# on sys.path (e.g. when run from the root, as python -m ipl_analysis is).
+import importlib
+
+# Public name -> script module it lives in
+_EXPORTS = {
+    # Ball-by-ball data
+    'load_deliveries': 'deliveries_cache',
+    'load_all_seasons': 'deliveries_cache',
+    'find_season_files': 'deliveries_cache',
+    'duplicate_seasons': 'deliveries_cache',
+    'load_player_index': 'player_index',
+    'build_batting_order': 'batting_order',
+    'load_batting_order': 'batting_order',
+    'player_batting_positions': 'batting_order',
+    # Per-match player statistics
+    'get_season_match_stats': 'generate_player_stats',
+    'process_season': 'generate_player_stats',
+    'update_season': 'generate_player_stats',
+    'process_all_seasons': 'generate_player_stats',
+    'stream_player_stats': 'stream_stats',
+    'build_player_store': 'player_store',
+    'load_player_store': 'player_store',
+    'get_player_rows': 'player_store',
+    'find_player_files': 'player_loader',
+    'load_player_files': 'player_loader',
+    # Season statistics and predictions
+    'compute_season_metrics': 'season_metrics',
+    'league_season_metrics': 'season_metrics',
+    'load_league_ranks': 'league_ranks',
+    'player_percentiles': 'league_ranks',
+    'percentile_of': 'league_ranks',
+    'load_matches': 'match_dimension',
+    'join_matches': 'match_dimension',
+    'order_by_date': 'match_dimension',
+    'load_cube': 'rollup_cube',
+    'rollup': 'rollup_cube',
+    'rolling_form': 'rolling_form',
+    'form_state_from_history': 'rolling_form',
+    'update_form': 'rolling_form',
+    'forecast_players': 'forecast',
+    'bootstrap_forecasts': 'forecast_intervals',
+    'load_feature_table': 'ml_forecast',
+    'train_models': 'ml_forecast',
+    'score_players': 'ml_forecast',
+    'backtest': 'backtest',
+    'calculate_season_stats': 'predict',
+    'predict_season_performance': 'predict',
+    # Dashboards
+    'create_bowler_dashboard': 'graph2',
+    'render_all': 'render_farm',
+    'save_dashboard': 'output_profiles'
+}
+
+__all__ = sorted(_EXPORTS)
+
+def _import_script(module_name):
+    """Import one of the repository's scripts, with a clear error when the repository root is not on sys.path"""
+    try:
+        return importlib.import_module(module_name)
+    except ModuleNotFoundError as e:
+        if e.name != module_name:
+            raise
+        raise ImportError(f"ipl_analysis needs the script {module_name}.py, which lives in the repository root: "
+                          f"run from the repository root or add it to sys.path") from e
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'ipl_analysis' has no attribute '{name}'")
+    value = getattr(_import_script(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
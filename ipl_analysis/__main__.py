@@ -0,0 +1,3 @@
+from ipl_analysis.cli import main
+
+main()
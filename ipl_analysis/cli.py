@@ -0,0 +1,53 @@
+import argparse
+import sys
+from ipl_analysis import _import_script
+
+# Subcommands: name -> (script module whose main() runs it, description).
+# Modules are imported only when their subcommand runs, so that e.g.
+# 'stats' never loads matplotlib and '--help' loads nothing at all.
+COMMANDS = {
+    'stats': ('generate_player_stats', "per-match player statistics of a season (or all seasons)"),
+    'stream': ('stream_stats', "per-match player statistics of large files in bounded memory"),
+    'cache': ('deliveries_cache', "convert the ball-by-ball CSVs to the typed cache"),
+    'index': ('player_index', "build the per-season player index"),
+    'batting-order': ('batting_order', "batting order of every innings"),
+    'store': ('player_store', "build the consolidated player-season store"),
+    'season-metrics': ('season_metrics', "season metrics of every player in the league"),
+    'league-ranks': ('league_ranks', "league-wide percentile ranks of every player-season"),
+    'matches': ('match_dimension', "a player's matches in date order with venue and toss"),
+    'cube': ('rollup_cube', "roll up player counters by season, opponent, venue and phase"),
+    'form': ('rolling_form', "rolling form of every player after every match"),
+    'forecast': ('forecast', "next-season forecasts of every player in the league"),
+    'intervals': ('forecast_intervals', "bootstrap prediction intervals of the next-season forecasts"),
+    'ml-forecast': ('ml_forecast', "train or load the learned forecast models and score every player"),
+    'backtest': ('backtest', "walk-forward backtest of the next-season forecasts"),
+    'predict': ('predict', "season-wise statistics and next-season prediction"),
+    'render': ('render_farm', "render player dashboards in parallel"),
+    'bowler-dashboard': ('graph2', "bowler dashboard of each season file"),
+    'overall': ('overall_stats_graphs', "match-by-match bowling and batting dashboards"),
+    'season-batsman': ('season_wise_batsman', "season-wise batting dashboard"),
+    'season-bowler': ('season_wise_bowler', "season-wise bowling dashboard"),
+    'summary': ('summary', "season-wise bowling summary dashboard"),
+    'benchmark-plotting': ('benchmark_plotting', "compare the plotting backends")
+}
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='ipl_analysis',
+        description="IPL player analysis. Run '%(prog)s <command> --help' for the options of a command.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n" + "\n".join(f"  {name:<20}{description}"
+                                         for name, (_, description) in COMMANDS.items()))
+    parser.add_argument('command', choices=list(COMMANDS), metavar='command',
+                        help="command to run (see below)")
+    parser.add_argument('args', nargs=argparse.REMAINDER,
+                        help="options of the command")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(sys.argv[1:] if argv is None else argv)
+    module_name, _ = COMMANDS[args.command]
+    module = _import_script(module_name)
+    # Show "ipl_analysis <command>" in the usage messages of the command
+    sys.argv[0] = f"ipl_analysis {args.command}"
+    return module.main(args.args)
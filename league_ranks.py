@@ -0,0 +1,157 @@
+import argparse
+import os
+import pickle
+import time
+import numpy as np
+import pandas as pd
+from deliveries_cache import dataset_signature, duplicate_seasons
+from player_store import build_player_store, normalize_player_name
+from season_metrics import compute_season_metrics
+
+# Bump when the ranked metrics or the table layout change
+RANKS_VERSION = 2
+
+# Metrics ranked within each season: (metric, higher is better, role).
+# Batting metrics rank the player-seasons with a ball faced, bowling metrics
+# those with a ball bowled.
+RANKED_METRICS = [
+    ('total_runs', True, 'batting'),
+    ('avg_runs', True, 'batting'),
+    ('strike_rate', True, 'batting'),
+    ('runs_per_dismissal', True, 'batting'),
+    ('boundary_rate', True, 'batting'),
+    ('high_strike_rate_percentage', True, 'batting'),
+    ('total_wickets', True, 'bowling'),
+    ('avg_wickets', True, 'bowling'),
+    ('economy_rate', False, 'bowling'),
+    ('runs_per_wicket', False, 'bowling'),
+    ('balls_per_wicket', False, 'bowling'),
+    ('dot_ball_percentage', True, 'bowling'),
+    ('wickets_per_balls', True, 'bowling')
+]
+
+# Percentiles stored for each season and metric, to rank any value
+PERCENTILES = np.arange(101)
+
+def ranks_path(dataset_folder='IPL_dataset'):
+    return os.path.join(dataset_folder, '.cache', 'league_ranks.pkl')
+
+def build_league_ranks(season_stats):
+    """
+    Percentile ranks and distribution tables of season metrics keyed by
+    (player, season), e.g. league season metrics from season_metrics.py.
+    
+    A player-season's percentile is the share (0-100) of the season's
+    qualifying player-seasons it is at least as good as. All metrics and
+    seasons are ranked in one grouped pass.
+    """
+    metrics = [metric for metric, _, _ in RANKED_METRICS]
+    qualified = {
+        'batting': (season_stats['innings_batted'] > 0).to_numpy(),
+        'bowling': (season_stats['total_balls_bowled'] > 0).to_numpy()
+    }
+    values = pd.DataFrame({
+        metric: season_stats[metric].where(qualified[role]) for metric, _, role in RANKED_METRICS
+    })
+    # Lower-is-better metrics are negated so that a higher rank is always better
+    signs = np.array([1.0 if higher else -1.0 for _, higher, _ in RANKED_METRICS])
+    seasons = season_stats['season'].astype(str).to_numpy()
+    percentiles = (values * signs).groupby(seasons).rank(method='max', pct=True) * 100
+    
+    # Distribution of each metric in each season, as its 0-100th percentiles
+    distribution = values.groupby(seasons).quantile(PERCENTILES / 100)
+    season_labels = sorted(set(seasons))
+    distributions = distribution.to_numpy().reshape(len(season_labels), len(PERCENTILES), len(metrics))
+    
+    players = season_stats['player'].astype(str).to_numpy()
+    return {
+        'version': RANKS_VERSION,
+        'metrics': metrics,
+        'signs': signs,
+        'positions': {key: position for position, key in enumerate(zip(players, seasons))},
+        'percentiles': percentiles[metrics].to_numpy(),
+        'seasons': {season: position for position, season in enumerate(season_labels)},
+        'distributions': distributions.transpose(0, 2, 1)
+    }
+
+def load_league_ranks(dataset_folder='IPL_dataset', use_cache=True):
+    """
+    League ranks of every player-season in the dataset folder but the
+    duplicate seasons (see deliveries_cache.duplicate_seasons), read from
+    the cache when the season files are unchanged and rebuilt otherwise
+    """
+    path = ranks_path(dataset_folder)
+    signature = dataset_signature(dataset_folder)
+    if use_cache and os.path.exists(path):
+        with open(path, 'rb') as f:
+            stored = pickle.load(f)
+        if stored['ranks']['version'] == RANKS_VERSION and stored['signature'] == signature:
+            return stored['ranks']
+    
+    frame = build_player_store(dataset_folder)['frame']
+    frame = frame[~frame['season'].astype(str).isin(list(duplicate_seasons(dataset_folder))).to_numpy()]
+    ranks = build_league_ranks(compute_season_metrics(frame, by=('player', 'season')))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        pickle.dump({'signature': signature, 'ranks': ranks}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return ranks
+
+def player_percentiles(ranks, player_name, season):
+    """
+    Percentile ranks of one player-season as {metric: percentile}, NaN for
+    metrics the player did not qualify for; None if the player-season is unknown
+    """
+    position = ranks['positions'].get((normalize_player_name(player_name), season))
+    if position is None:
+        return None
+    return dict(zip(ranks['metrics'], ranks['percentiles'][position].tolist()))
+
+def percentile_of(ranks, season, metric, value):
+    """Percentile rank (0-100) a value of a metric would have in a season"""
+    distribution = ranks['distributions'][ranks['seasons'][season], ranks['metrics'].index(metric)]
+    if np.isnan(value) or np.isnan(distribution).all():
+        return np.nan
+    percentile = np.interp(value, distribution, PERCENTILES)
+    return percentile if ranks['signs'][ranks['metrics'].index(metric)] > 0 else 100 - percentile
+
+def ranks_table(ranks):
+    """All percentile ranks as a DataFrame with player and season columns"""
+    keys = pd.DataFrame(list(ranks['positions']), columns=['player', 'season'])
+    percentiles = pd.DataFrame(ranks['percentiles'], columns=[f"{metric}_pct" for metric in ranks['metrics']])
+    return pd.concat([keys, percentiles], axis=1)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="League-wide percentile ranks of every player-season")
+    parser.add_argument('--dataset-folder', default='IPL_dataset',
+                        help="folder containing the IPL*.csv season files")
+    parser.add_argument('--player', default=None,
+                        help="print the ranks of this player (e.g. \"SP Narine\") instead of writing the table")
+    parser.add_argument('--season', default=None,
+                        help="season of --player, e.g. IPL2024 (default: every season)")
+    parser.add_argument('--output', default='league_ranks.csv',
+                        help="CSV file to write the table of all ranks to")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="ignore the cached tables")
+    args = parser.parse_args(argv)
+    
+    start = time.perf_counter()
+    ranks = load_league_ranks(args.dataset_folder, use_cache=not args.rebuild)
+    print(f"Loaded ranks of {len(ranks['positions'])} player-seasons in {time.perf_counter() - start:.2f}s")
+    
+    if args.player is None:
+        ranks_table(ranks).to_csv(args.output, index=False)
+        print(f"Wrote {args.output}")
+        return
+    
+    seasons = [args.season] if args.season else list(ranks['seasons'])
+    for season in seasons:
+        percentiles = player_percentiles(ranks, args.player, season)
+        if percentiles is None:
+            continue
+        print(f"\n{args.player} {season}:")
+        for metric, percentile in percentiles.items():
+            if not np.isnan(percentile):
+                print(f"{metric.replace('_', ' ').title()}: {percentile:.1f}th percentile")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from deliveries_cache import _source_signature
+from player_store import build_player_store, get_player_rows, load_player_store
+
+# Match dimension: one row per match of dataset/matches.csv (date, venue,
+# teams, toss and result), indexed by the integer match id that the
+# ball-by-ball data and the per-player rows carry. Rows are joined to it by
+# looking their match ids up in that index and taking the columns at the
+# found positions, so venue, date or toss become group-by keys without a
+# merge on strings, and a player's innings can be put in date order (match
+# ids are not: a few dozen matches were played before lower-numbered ones).
+
+# Next to this module, so that scripts run from any folder find it
+MATCHES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dataset', 'matches.csv')
+
+# Columns of the match table, in order (the id is the index)
+MATCH_COLUMNS = ['date', 'year', 'city', 'venue', 'match_type', 'team1', 'team2', 'toss_winner',
+                 'toss_decision', 'winner', 'result', 'result_margin', 'player_of_match']
+
+# Text columns with few distinct values, kept as categoricals
+CATEGORY_COLUMNS = ['city', 'venue', 'match_type', 'team1', 'team2', 'toss_winner', 'toss_decision',
+                    'winner', 'result']
+
+# Match tables loaded in this process: path -> (source signature, table)
+_loaded = {}
+
+def normalize_venue(venue):
+    """Venue without its city suffix, e.g. "Eden Gardens" for "Eden Gardens, Kolkata" """
+    return venue.split(',')[0].strip()
+
+def build_match_table(matches_file=MATCHES_FILE):
+    """The match table of a matches CSV, indexed by match id in id order"""
+    matches = pd.read_csv(matches_file)
+    matches['date'] = pd.to_datetime(matches['date'])
+    matches['year'] = matches['date'].dt.year.astype('int16')
+    matches['venue'] = matches['venue'].map(normalize_venue)
+    for column in CATEGORY_COLUMNS:
+        matches[column] = matches[column].astype('category')
+    return matches.set_index('id').sort_index()[MATCH_COLUMNS]
+
+def load_matches(matches_file=MATCHES_FILE):
+    """
+    The match table, read once per process and again only when the matches
+    file changes
+    """
+    signature = _source_signature(matches_file)
+    loaded = _loaded.get(matches_file)
+    if loaded is None or loaded[0] != signature:
+        loaded = (signature, build_match_table(matches_file))
+        _loaded[matches_file] = loaded
+    return loaded[1]
+
+def match_positions(match_ids, matches):
+    """Row of each match id in the match table (or a Series indexed by id), -1 where it has none"""
+    return matches.index.get_indexer(np.asarray(match_ids, dtype=np.int64))
+
+def join_matches(df, matches=None, columns=MATCH_COLUMNS, id_column='match_id'):
+    """
+    Rows of df (deliveries or per-match player rows) with the match columns
+    added; NaN (NaT for dates) for matches missing from the table
+    """
+    matches = load_matches() if matches is None else matches
+    positions = match_positions(df[id_column], matches)
+    found = positions >= 0
+    taken = matches[list(columns)].iloc[np.where(found, positions, 0)].set_axis(df.index)
+    joined = df.copy()
+    for column in columns:
+        joined[column] = taken[column].where(found)
+    return joined
+
+def order_by_date(df, matches=None, id_column='match_id'):
+    """
+    Rows of df in the order their matches were played; rows of the same date
+    (or of matches missing from the table, placed last) keep their order.
+    Without a match table (no matches file) the rows are left in file order.
+    """
+    if matches is None:
+        if not os.path.exists(MATCHES_FILE):
+            return df
+        matches = load_matches()
+    positions = match_positions(df[id_column], matches)
+    days = matches['date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    keys = np.where(positions >= 0, days[positions], np.iinfo(np.int64).max)
+    return df.iloc[np.argsort(keys, kind='stable')]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List a player's matches in date order with their venue and toss")
+    parser.add_argument('player',
+                        help="player, e.g. \"SP Narine\"")
+    parser.add_argument('--matches-file', default=MATCHES_FILE,
+                        help="match-level CSV of the match dimension")
+    parser.add_argument('--first-season', default=None,
+                        help="first season, e.g. 2020")
+    parser.add_argument('--last-season', default=None,
+                        help="last season, e.g. 2024")
+    parser.add_argument('--output', default=None,
+                        help="CSV file to write the matches to instead of printing them")
+    args = parser.parse_args(argv)
+    
+    store = load_player_store()
+    if store is None:
+        store = build_player_store()
+    rows = get_player_rows(store, args.player, args.first_season, args.last_season)
+    
+    start = time.perf_counter()
+    matches = load_matches(args.matches_file)
+    table = join_matches(order_by_date(rows, matches), matches,
+                         columns=['date', 'venue', 'toss_winner', 'toss_decision', 'winner'])
+    print(f"Joined {len(table)} matches of {len(matches)} in {(time.perf_counter() - start) * 1000:.1f}ms")
+    
+    columns = ['date', 'season', 'match_id', 'opponent_team', 'venue', 'toss_winner', 'toss_decision', 'winner',
+               'total_runs', 'balls_played', 'wickets_taken', 'balls_bowled']
+    if args.output:
+        table[columns].to_csv(args.output, index=False)
+        print(f"Wrote {len(table)} matches to {args.output}")
+    else:
+        print(table[columns].to_string(index=False))
+
+if __name__ == "__main__":
+    main()
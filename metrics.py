@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+# Derived cricket metrics computed on whole columns (pandas Series or NumPy
+# arrays) or on scalars, shared by the statistics, dashboard and prediction
+# modules so that every file computes a metric the same way.
+#
+# Zero-division semantics are explicit: each metric returns its `default`
+# wherever the denominator is zero (or missing).
+#   - rates per ball or innings (strike rate, economy, dot %, boundary rate,
+#     wicket rates) default to 0: nothing was faced or bowled;
+#   - per-wicket and per-dismissal metrics (averages, bowling strike rate)
+#     default to NaN: they are undefined, so plots leave a gap and means
+#     skip them instead of being dragged to 0 or infinity.
+
+def safe_divide(numerator, denominator, default=0.0, scale=1):
+    """
+    numerator / denominator * scale, element-wise, with `default` wherever
+    the denominator is zero or missing. Returns a Series (with the index of
+    the Series argument) for Series input, a float for scalar input and an
+    array otherwise.
+    """
+    index = next((value.index for value in (numerator, denominator) if isinstance(value, pd.Series)), None)
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    valid = (denominator != 0) & ~np.isnan(denominator)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = np.where(valid, numerator / np.where(valid, denominator, 1) * scale, default)
+    if index is not None:
+        return pd.Series(result, index=index)
+    if result.ndim == 0:
+        return float(result)
+    return result
+
+def batting_strike_rate(runs, balls_played):
+    """Runs per 100 balls faced; 0 without balls faced"""
+    return safe_divide(runs, balls_played, 0.0, scale=100)
+
+def batting_average(runs, dismissals):
+    """Runs per dismissal; NaN when never dismissed"""
+    return safe_divide(runs, dismissals, np.nan)
+
+def bowling_economy(runs_conceded, balls_bowled):
+    """Runs conceded per over; 0 without balls bowled"""
+    return safe_divide(runs_conceded, balls_bowled / 6, 0.0)
+
+def bowling_average(runs_conceded, wickets):
+    """Runs conceded per wicket; NaN without wickets"""
+    return safe_divide(runs_conceded, wickets, np.nan)
+
+def bowling_strike_rate(balls_bowled, wickets):
+    """Balls bowled per wicket; NaN without wickets"""
+    return safe_divide(balls_bowled, wickets, np.nan)
+
+def dot_ball_percentage(dot_balls, balls_bowled):
+    """Percentage of balls bowled that were dot balls; 0 without balls bowled"""
+    return safe_divide(dot_balls, balls_bowled, 0.0, scale=100)
+
+def wickets_per_ball(wickets, balls_bowled):
+    """Wickets per ball bowled; 0 without balls bowled"""
+    return safe_divide(wickets, balls_bowled, 0.0)
+
+def wickets_per_run(wickets, runs_conceded):
+    """Wickets per run conceded; 0 without runs conceded"""
+    return safe_divide(wickets, runs_conceded, 0.0)
+
+def boundary_rate(fours, sixes, innings):
+    """Boundaries (fours and sixes) per innings; 0 without innings"""
+    return safe_divide(fours + sixes, innings, 0.0)
+
+def percentage(count, total):
+    """count as a percentage of total; 0 when total is 0"""
+    return safe_divide(count, total, 0.0, scale=100)
+
+def efficiency(batting_position, runs):
+    """
+    1 for an innings of at least 30 runs when batting in the top 4, or of at
+    least 20 runs when batting at 5 or lower, otherwise 0
+    """
+    index = next((value.index for value in (batting_position, runs) if isinstance(value, pd.Series)), None)
+    result = np.where(np.asarray(batting_position) <= 4, np.asarray(runs) >= 30, np.asarray(runs) >= 20).astype(int)
+    if index is not None:
+        return pd.Series(result, index=index)
+    if result.ndim == 0:
+        return int(result)
+    return result
@@ -0,0 +1,243 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+from deliveries_cache import dataset_signature, duplicate_seasons
+from forecast import FORECASTS
+from player_store import build_player_store
+from season_metrics import compute_season_metrics
+
+# Learned next-season forecasts. A feature table holds, for every
+# player-season, lagged features of the player's history up to that season
+# and the metrics of their next season as targets. One random forest per
+# role is trained on it and saved with its scaler, so scoring only loads
+# the saved models.
+#
+# A season whose file repeats an earlier one (IPL2018.csv is a copy of
+# IPL2017.csv) is left out of the table: as the next season of the one it
+# copies its targets would equal the features, and the models would learn
+# to predict last season again.
+
+# Bump when the features or their definitions change
+FEATURES_VERSION = 2
+
+# Bump when the models or their training change
+MODEL_VERSION = 1
+
+# Season metrics (see season_metrics.py) the features are made from
+FEATURE_METRICS = [
+    'matches',
+    'avg_runs',
+    'strike_rate',
+    'boundary_rate',
+    'avg_position',
+    'innings_batted',
+    'total_balls_played',
+    'avg_wickets',
+    'economy_rate',
+    'dot_ball_percentage',
+    'total_balls_bowled'
+]
+
+# Features of a player-season: each metric in that season (lag1) and the
+# season before (lag2), its exponentially weighted average over the
+# player's seasons so far (ewm, the forecast.py baseline), and the history
+# length
+FEATURE_COLUMNS = (
+    [f"{metric}_{kind}" for kind in ('lag1', 'lag2', 'ewm') for metric in FEATURE_METRICS]
+    + ['seasons_played', 'has_lag2']
+)
+
+# Targets of each role and the metric a player needs in the target season
+# to be trained on
+ROLE_TARGETS = {
+    'batting': ['avg_runs', 'strike_rate'],
+    'bowling': ['avg_wickets', 'economy_rate']
+}
+ROLE_QUALIFIERS = {'batting': 'innings_batted', 'bowling': 'total_balls_bowled'}
+
+MODEL_FILE = os.path.join('models', 'forecast_models.joblib')
+
+def feature_table_path(dataset_folder='IPL_dataset'):
+    return os.path.join(dataset_folder, '.cache', 'feature_table.pkl')
+
+def build_feature_table(season_stats):
+    """
+    Lagged features and next-season targets of every player-season, from
+    season metrics keyed by (player, season) with each player's rows in
+    season order. Targets (next_<metric>) are NaN for a player's last
+    season; 'consecutive' tells whether the next season is the following
+    year.
+    """
+    stats = season_stats.reset_index(drop=True)
+    players = stats['player'].astype(str)
+    groups = stats.groupby(players, sort=False)
+    position = groups.cumcount().to_numpy()
+    table = pd.DataFrame({
+        'player': players,
+        'season': stats['season'].astype(str),
+        'year': stats['season'].astype(str).str[-4:].astype(int)
+    })
+    
+    values = stats[FEATURE_METRICS].astype(float)
+    previous = groups[FEATURE_METRICS].shift(1)
+    # Weights e^position cumulated per player: the latest season weighs e
+    # times the one before, as in forecast.weighted_forecast
+    weights = pd.Series(np.exp(position.astype(float)), index=stats.index)
+    weighted = (values.mul(weights, axis=0)).groupby(players, sort=False).cumsum()
+    ewm = weighted.div(weights.groupby(players, sort=False).cumsum(), axis=0)
+    for metric in FEATURE_METRICS:
+        table[f"{metric}_lag1"] = values[metric]
+        table[f"{metric}_lag2"] = previous[metric].fillna(0)
+        table[f"{metric}_ewm"] = ewm[metric]
+    table['seasons_played'] = position + 1
+    table['has_lag2'] = (position > 0).astype(int)
+    
+    following = groups[sorted(set(sum(ROLE_TARGETS.values(), [])) | set(ROLE_QUALIFIERS.values()))].shift(-1)
+    for column in following.columns:
+        table[f"next_{column}"] = following[column]
+    table['next_year'] = table.groupby('player', sort=False)['year'].shift(-1)
+    table['consecutive'] = table['next_year'] == table['year'] + 1
+    return table
+
+def load_feature_table(dataset_folder='IPL_dataset', use_cache=True):
+    """
+    Feature table of every player-season in the dataset folder but the
+    duplicate seasons, read from the cache when the season files are
+    unchanged and rebuilt otherwise
+    """
+    path = feature_table_path(dataset_folder)
+    signature = dataset_signature(dataset_folder)
+    if use_cache and os.path.exists(path):
+        with open(path, 'rb') as f:
+            stored = pickle.load(f)
+        if stored['version'] == FEATURES_VERSION and stored['signature'] == signature:
+            return stored['features']
+    
+    frame = build_player_store(dataset_folder)['frame']
+    frame = frame[~frame['season'].astype(str).isin(list(duplicate_seasons(dataset_folder))).to_numpy()]
+    features = build_feature_table(compute_season_metrics(frame, by=('player', 'season')))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        pickle.dump({'version': FEATURES_VERSION, 'signature': signature, 'features': features}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    return features
+
+def training_rows(features, role, through_season=None):
+    """Rows a role's model learns from: a next season the year after, played in the role"""
+    rows = features['consecutive'] & (features[f"next_{ROLE_QUALIFIERS[role]}"] > 0)
+    if through_season is not None:
+        rows &= features['next_year'] <= int(str(through_season)[-4:])
+    return features[rows.to_numpy()]
+
+def train_models(features, through_season=None, n_estimators=200, n_jobs=-1, random_state=0):
+    """
+    Fit a scaler and a random forest per role on the feature table, only
+    learning from target seasons up to through_season when given. The
+    forests are fitted on n_jobs cores (-1: all of them).
+    """
+    models = {}
+    for role, targets in ROLE_TARGETS.items():
+        rows = training_rows(features, role, through_season)
+        scaler = StandardScaler().fit(rows[FEATURE_COLUMNS])
+        model = RandomForestRegressor(n_estimators=n_estimators, min_samples_leaf=5,
+                                      n_jobs=n_jobs, random_state=random_state)
+        model.fit(scaler.transform(rows[FEATURE_COLUMNS]), rows[[f"next_{target}" for target in targets]])
+        models[role] = {'scaler': scaler, 'model': model, 'targets': targets, 'rows': len(rows)}
+    return models
+
+def model_key(dataset_folder='IPL_dataset', through_season=None, n_estimators=200, random_state=0):
+    """Version key of saved models: everything that changes what training produces"""
+    return hashlib.sha1(json.dumps({
+        'features_version': FEATURES_VERSION,
+        'model_version': MODEL_VERSION,
+        'dataset': dataset_signature(dataset_folder),
+        'through_season': None if through_season is None else int(str(through_season)[-4:]),
+        'n_estimators': n_estimators,
+        'random_state': random_state
+    }, sort_keys=True).encode()).hexdigest()
+
+def save_models(models, key, model_file=MODEL_FILE):
+    os.makedirs(os.path.dirname(model_file) or '.', exist_ok=True)
+    joblib.dump({'key': key, 'models': models}, model_file)
+
+def load_models(key, model_file=MODEL_FILE):
+    """Saved models, or None if there are none or they were trained under another key"""
+    if not os.path.exists(model_file):
+        return None
+    saved = joblib.load(model_file)
+    if saved.get('key') != key:
+        return None
+    return saved['models']
+
+def score_players(models, features, through_season=None):
+    """
+    Next-season forecasts of every player from their latest season up to
+    through_season (default: their latest season), with the predicted_*
+    columns of forecast.py
+    """
+    if through_season is not None:
+        features = features[(features['year'] <= int(str(through_season)[-4:])).to_numpy()]
+    latest = features.groupby('player', sort=True).tail(1)
+    forecasts = latest[['player', 'season']].rename(columns={'season': 'last_season'}).reset_index(drop=True)
+    predicted_columns = {metric: column for column, (metric, _) in FORECASTS.items()}
+    for role, fitted in models.items():
+        predictions = fitted['model'].predict(fitted['scaler'].transform(latest[FEATURE_COLUMNS]))
+        for position, target in enumerate(fitted['targets']):
+            forecasts[predicted_columns[target]] = predictions[:, position]
+    return forecasts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train (or load) the learned forecast models and score every player")
+    parser.add_argument('--dataset-folder', default='IPL_dataset',
+                        help="folder containing the IPL*.csv season files")
+    parser.add_argument('--through-season', default=None,
+                        help="train on and score from the seasons up to this one, e.g. 2023 (default: all)")
+    parser.add_argument('--model-file', default=MODEL_FILE,
+                        help="file the fitted models and scalers are saved to")
+    parser.add_argument('--n-estimators', type=int, default=200,
+                        help="trees per random forest")
+    parser.add_argument('--n-jobs', type=int, default=-1,
+                        help="cores used for training (-1: all)")
+    parser.add_argument('--retrain', action='store_true',
+                        help="train even if saved models match")
+    parser.add_argument('--player', default=None,
+                        help="print the forecast of this player (e.g. \"SP Narine\") instead of writing the table")
+    parser.add_argument('--output', default='ml_forecasts.csv',
+                        help="CSV file to write the forecasts to")
+    args = parser.parse_args(argv)
+    
+    start = time.perf_counter()
+    features = load_feature_table(args.dataset_folder)
+    print(f"Loaded {len(features)} player-season features in {time.perf_counter() - start:.2f}s")
+    
+    key = model_key(args.dataset_folder, args.through_season, args.n_estimators)
+    models = None if args.retrain else load_models(key, args.model_file)
+    start = time.perf_counter()
+    if models is None:
+        models = train_models(features, args.through_season, args.n_estimators, args.n_jobs)
+        save_models(models, key, args.model_file)
+        rows = ', '.join(f"{role}: {fitted['rows']} rows" for role, fitted in models.items())
+        print(f"Trained the models ({rows}) in {time.perf_counter() - start:.2f}s, saved to {args.model_file}")
+    else:
+        print(f"Loaded the saved models from {args.model_file} in {time.perf_counter() - start:.2f}s")
+    
+    start = time.perf_counter()
+    forecasts = score_players(models, features, args.through_season)
+    print(f"Scored {len(forecasts)} players in {time.perf_counter() - start:.2f}s")
+    
+    if args.player is not None:
+        print(forecasts[forecasts['player'] == args.player].to_string(index=False))
+        return
+    forecasts.to_csv(args.output, index=False)
+    print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import io
+import json
+import os
+import struct
+import time
+from PIL import Image
+
+# Output profiles of the dashboards:
+#   full       - 300 dpi PNG (the original output)
+#   draft      - 72 dpi PNG, quick to rasterise, for checking a layout
+#   thumbnails - pyramid of small PNGs (96, 48 and 24 dpi) made from one render
+#   svg / pdf  - vector images
+PROFILES = {
+    'full': {'format': 'png', 'dpi': 300, 'suffix': ''},
+    'draft': {'format': 'png', 'dpi': 72, 'suffix': '_draft'},
+    'thumbnails': {'format': 'png', 'dpi': 96, 'suffix': '_thumb', 'levels': 3},
+    'svg': {'format': 'svg', 'dpi': 300, 'suffix': ''},
+    'pdf': {'format': 'pdf', 'dpi': 300, 'suffix': ''}
+}
+
+# Append-only manifest (one JSON entry per line) kept in each output folder.
+# Appending keeps entries written by parallel render workers intact.
+MANIFEST_FILE = 'manifest.jsonl'
+
+def output_files(output_file, profile='full'):
+    """
+    Files a profile writes for a dashboard whose full resolution image is
+    output_file, e.g. "bowler/X_dashboard.png" gives "bowler/X_dashboard_draft.png"
+    for 'draft' and "bowler/X_dashboard_thumb96.png", "..._thumb48.png" and
+    "..._thumb24.png" for 'thumbnails'. The first file is the main one.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown output profile: {profile}")
+    spec = PROFILES[profile]
+    stem = os.path.splitext(output_file)[0] + spec['suffix']
+    if 'levels' in spec:
+        return [f"{stem}{spec['dpi'] >> level}.{spec['format']}" for level in range(spec['levels'])]
+    return [f"{stem}.{spec['format']}"]
+
+def _png_size(png_file):
+    """(width, height) of a PNG, read from its header"""
+    with open(png_file, 'rb') as f:
+        return struct.unpack('>II', f.read(24)[16:24])
+
+def _manifest_entry(output_file, dashboard_file, profile, dpi, size):
+    return {
+        'file': os.path.basename(output_file),
+        'dashboard': os.path.basename(dashboard_file),
+        'profile': profile,
+        'format': PROFILES[profile]['format'],
+        'dpi': dpi,
+        'width': size[0] if size else None,
+        'height': size[1] if size else None,
+        'bytes': os.path.getsize(output_file),
+        'rendered_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+def append_manifest(folder, entries):
+    """Append entries to the manifest of an output folder"""
+    lines = ''.join(json.dumps(entry) + '\n' for entry in entries)
+    with open(os.path.join(folder or '.', MANIFEST_FILE), 'a') as f:
+        f.write(lines)
+
+def read_manifest(folder):
+    """Latest manifest entry of every file in an output folder"""
+    manifest_file = os.path.join(folder or '.', MANIFEST_FILE)
+    entries = {}
+    if os.path.exists(manifest_file):
+        with open(manifest_file) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entries[entry['file']] = entry
+    return entries
+
+def save_dashboard(fig, output_file, profile='full', bbox_inches='tight'):
+    """
+    Save a dashboard figure with an output profile and record the written
+    files in the manifest of their folder. output_file is the path of the
+    full resolution image; see output_files for what the other profiles
+    write. Returns the main file written.
+    """
+    spec = PROFILES[profile]
+    files = output_files(output_file, profile)
+    entries = []
+    if 'levels' in spec:
+        # Rasterise once at the largest size and halve it for each level
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=spec['dpi'], bbox_inches=bbox_inches)
+        buffer.seek(0)
+        image = Image.open(buffer)
+        for level, level_file in enumerate(files):
+            if level:
+                # Average 2x2 blocks into one pixel
+                image = image.reduce(2)
+            image.save(level_file)
+            entries.append(_manifest_entry(level_file, output_file, profile, spec['dpi'] >> level, image.size))
+    else:
+        fig.savefig(files[0], format=spec['format'], dpi=spec['dpi'], bbox_inches=bbox_inches)
+        size = None
+        if spec['format'] == 'png':
+            size = _png_size(files[0])
+        entries.append(_manifest_entry(files[0], output_file, profile, spec['dpi'], size))
+    append_manifest(os.path.dirname(output_file), entries)
+    return files[0]
@@ -1,32 +1,53 @@
-import pandas as pd
+import argparse
 import matplotlib.pyplot as plt
-import seaborn as sns
+import plotting
 import os
+from batting_order import load_batting_order, player_batting_positions
+from player_loader import load_player_files
+from player_store import load_player_store
+from match_dimension import order_by_date
+from metrics import bowling_strike_rate, efficiency
+from output_profiles import PROFILES, output_files, save_dashboard
+from render_cache import is_render_current, record_render, render_key
+from rolling_form import DEFAULT_HALF_LIFE, DEFAULT_WINDOW, FORM_INPUTS, rolling_form
+
+# Legend label of the rolling-form lines
+FORM_LABEL = f'Form (last {DEFAULT_WINDOW} innings)'
 
 # Function to combine all CSV files into a single DataFrame
-def combine_csv_files(csv_files):
-    combined_df = pd.DataFrame()
-    for csv_file in csv_files:
-        df = pd.read_csv(csv_file)
-        # Extract player name from filename
-        player_name = csv_file.split('_')[0]
-        df['player_name'] = player_name  # Add player_name column
-        combined_df = pd.concat([combined_df, df])
-    return combined_df
+def combine_csv_files(csv_files, store=None):
+    # Adds player_name and season columns, see player_loader.py; the
+    # innings are put in the order they were played, whatever the file order
+    return order_by_date(load_player_files(csv_files, store=store)).reset_index(drop=True)
 
 # Function to create bowler dashboard
-def create_bowler_dashboard(df, player_name):
+def create_bowler_dashboard(df, player_name, force=False, profile='full'):
+    # Ensure the "bowler" folder exists
+    output_folder = "bowler"
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+    full_file = os.path.join(output_folder, f"{player_name.replace(' ', '_')}_bowler_dashboard.png")
+    output_file = output_files(full_file, profile)[0]
+    
+    # Skip the render when the plotted metrics and layout are unchanged
+    plotted = ['serial_order', 'bowling_economy', 'wickets_taken', 'balls_bowled']
+    key = render_key('overall_bowler_dashboard', df[list(dict.fromkeys(plotted + FORM_INPUTS))], title=player_name,
+                     form_window=DEFAULT_WINDOW, form_half_life=DEFAULT_HALF_LIFE)
+    if not force and is_render_current(output_file, key):
+        return output_file
+    
     # Set style for better visualization
-    plt.style.use('default')
-    sns.set_theme()
+    plotting.apply_theme('darkgrid')
     
     # Create figure and subplots
     fig = plt.figure(figsize=(15, 12))
     fig.suptitle(f"{player_name} Bowling Performance Analysis", fontsize=16, y=0.95)
+    form = rolling_form(df)
     
     # 1. Economy
     ax1 = plt.subplot(2, 2, 1)
-    sns.lineplot(data=df, x='serial_order', y='bowling_economy', color='orange', marker='o', ax=ax1)
+    plotting.lineplot(ax1, df, 'serial_order', 'bowling_economy', color='orange')
+    plotting.formline(ax1, df['serial_order'], form['form_economy'], FORM_LABEL)
     avg_economy = df['bowling_economy'].mean()
     ax1.axhline(y=avg_economy, color='gray', linestyle=':', label='Average Economy')
     ax1.text(0.5, avg_economy, f'Avg: {avg_economy:.2f}', color='gray', ha='center', va='bottom')
@@ -37,7 +58,8 @@ def create_bowler_dashboard(df, player_name):
     
     # 2. Total Wickets per Season
     ax2 = plt.subplot(2, 2, 2)
-    sns.lineplot(data=df, x='serial_order', y='wickets_taken', color='green', marker='o', ax=ax2)
+    plotting.lineplot(ax2, df, 'serial_order', 'wickets_taken', color='green')
+    plotting.formline(ax2, df['serial_order'], form['form_wickets'], FORM_LABEL)
     avg_wickets = df['wickets_taken'].mean()
     ax2.axhline(y=avg_wickets, color='gray', linestyle=':', label='Average Wickets')
     ax2.text(0.5, avg_wickets, f'Avg: {avg_wickets:.2f}', color='gray', ha='center', va='bottom')
@@ -46,10 +68,11 @@ def create_bowler_dashboard(df, player_name):
     ax2.set_ylabel('Wickets')
     ax2.legend()
     
-    # 3. Bowler's Strike Rate
-    df['bowling_strike_rate'] = df['balls_bowled'] / df['wickets_taken']
+    # 3. Bowler's Strike Rate (undefined, so left out, in matches without a wicket)
+    df['bowling_strike_rate'] = bowling_strike_rate(df['balls_bowled'], df['wickets_taken'])
     ax3 = plt.subplot(2, 2, 3)
-    sns.lineplot(data=df, x='serial_order', y='bowling_strike_rate', color='blue', marker='o', ax=ax3)
+    plotting.lineplot(ax3, df, 'serial_order', 'bowling_strike_rate', color='blue')
+    plotting.formline(ax3, df['serial_order'], form['form_bowling_strike_rate'], FORM_LABEL)
     avg_strike_rate = df['bowling_strike_rate'].mean()
     ax3.axhline(y=avg_strike_rate, color='gray', linestyle=':', label='Average Strike Rate')
     ax3.text(0.5, avg_strike_rate, f'Avg: {avg_strike_rate:.2f}', color='gray', ha='center', va='bottom')
@@ -61,31 +84,47 @@ def create_bowler_dashboard(df, player_name):
     # Adjust layout
     plt.tight_layout()
     
-    # Ensure the "bowler" folder exists
-    output_folder = "bowler"
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
-    
-    # Save the dashboard
-    output_file = os.path.join(output_folder, f"{player_name}_bowler_dashboard.png")
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    # Save the dashboard with the requested output profile
+    save_dashboard(fig, full_file, profile)
     plt.close()
+    record_render(output_file, key)
     
     return output_file
 
 # Function to create batsman dashboard
-def create_batsman_dashboard(df, player_name):
+def create_batsman_dashboard(df, player_name, batting_positions=None, force=False, profile='full'):
+    # Take batting positions from the batting order table when given
+    # (a frame of match_id, batting_position, see batting_order.py)
+    if batting_positions is not None:
+        df = df.drop(columns='batting_position').merge(batting_positions, on='match_id', how='left')
+        df['batting_position'] = df['batting_position'].fillna(0).astype(int)
+    
+    # Ensure the "batsman" folder exists
+    output_folder = "batsman"
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+    full_file = os.path.join(output_folder, f"{player_name.replace(' ', '_')}_batsman_dashboard.png")
+    output_file = output_files(full_file, profile)[0]
+    
+    # Skip the render when the plotted metrics and layout are unchanged
+    plotted = ['serial_order', 'total_runs', 'batting_strike_rate', 'batting_position']
+    key = render_key('overall_batsman_dashboard', df[list(dict.fromkeys(plotted + FORM_INPUTS))], title=player_name,
+                     form_window=DEFAULT_WINDOW, form_half_life=DEFAULT_HALF_LIFE)
+    if not force and is_render_current(output_file, key):
+        return output_file
+    
     # Set style for better visualization
-    plt.style.use('default')
-    sns.set_theme()
+    plotting.apply_theme('darkgrid')
     
     # Create figure and subplots
     fig = plt.figure(figsize=(15, 12))
     fig.suptitle(f"{player_name} Batting Performance Analysis", fontsize=16, y=0.95)
+    form = rolling_form(df)
     
     # 1. Total Runs
     ax1 = plt.subplot(2, 2, 1)
-    sns.lineplot(data=df, x='serial_order', y='total_runs', color='orange', marker='o', ax=ax1)
+    plotting.lineplot(ax1, df, 'serial_order', 'total_runs', color='orange')
+    plotting.formline(ax1, df['serial_order'], form['form_runs'], FORM_LABEL)
     avg_runs = df['total_runs'].mean()
     ax1.axhline(y=avg_runs, color='gray', linestyle=':', label='Average Runs')
     ax1.text(0.5, avg_runs, f'Avg: {avg_runs:.2f}', color='gray', ha='center', va='bottom')
@@ -96,7 +135,8 @@ def create_batsman_dashboard(df, player_name):
     
     # 2. Batting Strike Rate
     ax2 = plt.subplot(2, 2, 2)
-    sns.lineplot(data=df, x='serial_order', y='batting_strike_rate', color='green', marker='o', ax=ax2)
+    plotting.lineplot(ax2, df, 'serial_order', 'batting_strike_rate', color='green')
+    plotting.formline(ax2, df['serial_order'], form['form_strike_rate'], FORM_LABEL)
     avg_strike_rate = df['batting_strike_rate'].mean()
     ax2.axhline(y=avg_strike_rate, color='gray', linestyle=':', label='Average Strike Rate')
     ax2.text(0.5, avg_strike_rate, f'Avg: {avg_strike_rate:.2f}', color='gray', ha='center', va='bottom')
@@ -106,10 +146,9 @@ def create_batsman_dashboard(df, player_name):
     ax2.legend()
     
     # 3. Efficiency (No. of times crossed 30 for 1-4 batting position, 20 for 5 onwards)
-    df['efficiency'] = df.apply(lambda row: 1 if (row['batting_position'] <= 4 and row['total_runs'] >= 30) or 
-                                             (row['batting_position'] > 4 and row['total_runs'] >= 20) else 0, axis=1)
+    df['efficiency'] = efficiency(df['batting_position'], df['total_runs'])
     ax3 = plt.subplot(2, 2, 3)
-    sns.lineplot(data=df, x='serial_order', y='efficiency', color='blue', marker='o', ax=ax3)
+    plotting.lineplot(ax3, df, 'serial_order', 'efficiency', color='blue')
     avg_efficiency = df['efficiency'].mean()
     ax3.axhline(y=avg_efficiency, color='gray', linestyle=':', label='Average Efficiency')
     ax3.text(0.5, avg_efficiency, f'Avg: {avg_efficiency:.2f}', color='gray', ha='center', va='bottom')
@@ -121,47 +160,57 @@ def create_batsman_dashboard(df, player_name):
     # Adjust layout
     plt.tight_layout()
     
-    # Ensure the "batsman" folder exists
-    output_folder = "batsman"
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
-    
-    # Save the dashboard
-    output_file = os.path.join(output_folder, f"{player_name}_batsman_dashboard.png")
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    # Save the dashboard with the requested output profile
+    save_dashboard(fig, full_file, profile)
     plt.close()
+    record_render(output_file, key)
     
     return output_file
 
-# List your CSV files
-csv_files = [
-    "LH_Ferguson_IPL2023.csv",
-    "LH_Ferguson_IPL2024.csv",
-    "LH_Ferguson_IPL2021.csv",
-    "LH_Ferguson_IPL2022.csv",
-    "LH_Ferguson_IPL2020.csv",
-    "LH_Ferguson_IPL2018.csv",
-    "LH_Ferguson_IPL2017.csv"
-]
-
-combined_df = combine_csv_files(csv_files)
-
-players = combined_df['player_name'].unique()
-for player in players:
-    player_df = combined_df[combined_df['player_name'] == player]
-    player_df['serial_order'] = range(1, len(player_df) + 1)
-
-
-try:
-    # Create bowler dashboard
-    if 'bowling_economy' in player_df.columns:
-        bowler_dashboard_file = create_bowler_dashboard(player_df, player)
-        print(f"Created bowler dashboard for {player}: {bowler_dashboard_file}")
-    
-    # Create batsman dashboard
-    if 'total_runs' in player_df.columns:
-        batsman_dashboard_file = create_batsman_dashboard(player_df, player)
-        print(f"Created batsman dashboard for {player}: {batsman_dashboard_file}")
+def main(argv=None):
+    # List your CSV files
+    csv_files = [
+        "LH_Ferguson_IPL2023.csv",
+        "LH_Ferguson_IPL2024.csv",
+        "LH_Ferguson_IPL2021.csv",
+        "LH_Ferguson_IPL2022.csv",
+        "LH_Ferguson_IPL2020.csv",
+        "LH_Ferguson_IPL2018.csv",
+        "LH_Ferguson_IPL2017.csv"
+    ]
+    
+    parser = argparse.ArgumentParser(description="Create the match-by-match bowling and batting dashboards of a player")
+    parser.add_argument('files', nargs='*', default=csv_files,
+                        help="per-player season CSVs of the player (default: the example player above)")
+    parser.add_argument('--profile', default='full', choices=list(PROFILES),
+                        help="output images to write, see output_profiles.py")
+    args = parser.parse_args(argv)
+    csv_files = args.files
+    
+    combined_df = combine_csv_files(csv_files, load_player_store())
+    
+    players = combined_df['player_name'].unique()
+    for player in players:
+        player_df = combined_df[combined_df['player_name'] == player]
+        player_df['serial_order'] = range(1, len(player_df) + 1)
+    
+    
+    try:
+        # Create bowler dashboard
+        if 'bowling_economy' in player_df.columns:
+            bowler_dashboard_file = create_bowler_dashboard(player_df, player, profile=args.profile)
+            print(f"Created bowler dashboard for {player}: {bowler_dashboard_file}")
         
-except Exception as e:
-    print(f"Error processing {player}: {str(e)}")
\ No newline at end of file
+        # Create batsman dashboard
+        if 'total_runs' in player_df.columns:
+            batting_positions = player_batting_positions(load_batting_order(), player)
+            batsman_dashboard_file = create_batsman_dashboard(player_df, player, batting_positions, profile=args.profile)
+            print(f"Created batsman dashboard for {player}: {batsman_dashboard_file}")
+    
+    except Exception as e:
+        print(f"Error processing {player}: {str(e)}")
+
+# Run the pipeline only when executed as a script, so the dashboard
+# functions can be imported (e.g. by render_farm.py)
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import pickle
+import time
+import numpy as np
+import pandas as pd
+from deliveries_cache import cache_paths, find_season_files, is_cache_valid, load_deliveries, season_name
+
+# Columns a player can appear in, one index per role
+ROLE_COLUMNS = ['batter', 'bowler', 'non_striker', 'player_dismissed', 'fielder']
+
+# Bump when the index layout changes so stale index files are rebuilt
+INDEX_VERSION = 1
+
+def _group_rows(values):
+    """Map every distinct non-null value of a column to its sorted row positions"""
+    codes, names = pd.factorize(values, use_na_sentinel=True)
+    codes = np.asarray(codes)
+    rows = np.flatnonzero(codes >= 0)
+    codes = codes[rows]
+    order = np.argsort(codes, kind='stable')
+    rows, codes = rows[order].astype(np.int32), codes[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.array([], dtype=int)
+    groups = np.split(rows, starts[1:])
+    return {names[code]: group for code, group in zip(codes[starts], groups)}
+
+def build_player_index(deliveries):
+    """
+    Build the inverted index of a season's deliveries:
+      roles[role][player] -> sorted row positions where the player appears in that role
+      rows[player]        -> sorted row positions over all roles
+      matches[player]     -> match_ids the player appears in, in dataset order
+      match_bounds[match_id] -> (first row, last row + 1) of the match
+    Row positions are positional (for .iloc) into the deliveries frame.
+    """
+    roles = {role: _group_rows(deliveries[role]) for role in ROLE_COLUMNS}
+    
+    all_players = set().union(*(roles[role].keys() for role in ROLE_COLUMNS))
+    rows = {
+        player: np.unique(np.concatenate([
+            roles[role][player] for role in ROLE_COLUMNS if player in roles[role]
+        ]))
+        for player in all_players
+    }
+    
+    match_ids = deliveries['match_id'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, match_ids[1:] != match_ids[:-1]]) if len(match_ids) else np.array([], dtype=int)
+    stops = np.r_[starts[1:], len(match_ids)]
+    match_bounds = {int(match_ids[start]): (int(start), int(stop)) for start, stop in zip(starts, stops)}
+    match_order = match_ids[starts]
+    
+    # Deliveries are stored match by match, so mapping each row to the match
+    # it starts in keeps the player's matches in dataset order
+    matches = {
+        player: pd.unique(match_order[np.searchsorted(starts, player_rows, side='right') - 1])
+        for player, player_rows in rows.items()
+    }
+    
+    return {
+        'roles': roles,
+        'rows': rows,
+        'matches': matches,
+        'match_bounds': match_bounds,
+        'match_starts': starts,
+        'match_order': match_order
+    }
+
+def index_path(csv_file, cache_folder=None):
+    """Location of the persisted index, next to the season's deliveries cache"""
+    data_file, _ = cache_paths(csv_file, cache_folder)
+    return data_file.replace('.pkl', '.index.pkl')
+
+def _cache_sha1(csv_file, cache_folder=None):
+    with open(cache_paths(csv_file, cache_folder)[1]) as f:
+        return json.load(f)['sha1']
+
+def load_player_index(csv_file, deliveries=None, cache_folder=None):
+    """
+    Load the persisted player index of a season file, rebuilding it when the
+    source CSV changed since it was written.
+    """
+    path = index_path(csv_file, cache_folder)
+    cache_valid = is_cache_valid(csv_file, cache_folder)
+    if cache_valid and os.path.exists(path):
+        with open(path, 'rb') as f:
+            stored = pickle.load(f)
+        if stored['version'] == INDEX_VERSION and stored['sha1'] == _cache_sha1(csv_file, cache_folder):
+            return stored['index']
+    
+    if deliveries is None or not cache_valid:
+        # Also refreshes the deliveries cache the index is keyed on
+        deliveries = load_deliveries(csv_file, cache_folder)
+    index = build_player_index(deliveries)
+    with open(path, 'wb') as f:
+        pickle.dump({
+            'version': INDEX_VERSION,
+            'sha1': _cache_sha1(csv_file, cache_folder),
+            'index': index
+        }, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return index
+
+def player_in_roles(index, player_name, roles=('batter', 'bowler')):
+    """Check whether the player appears in any of the given roles"""
+    return any(player_name in index['roles'][role] for role in roles)
+
+def player_rows(index, player_name, roles=None):
+    """Sorted row positions of the player, over all roles or only the given ones"""
+    if roles is None:
+        return index['rows'].get(player_name, np.array([], dtype=np.int32))
+    found = [index['roles'][role][player_name] for role in roles if player_name in index['roles'][role]]
+    if not found:
+        return np.array([], dtype=np.int32)
+    return np.unique(np.concatenate(found))
+
+def player_matches(index, player_name, roles=None):
+    """match_ids the player appears in (in the given roles), in dataset order"""
+    if roles is None:
+        return index['matches'].get(player_name, np.array([], dtype=np.int64))
+    rows = player_rows(index, player_name, roles)
+    return pd.unique(index['match_order'][np.searchsorted(index['match_starts'], rows, side='right') - 1])
+
+def match_slice(deliveries, index, match_id):
+    """Deliveries of a single match, keeping the original row labels"""
+    start, stop = index['match_bounds'][match_id]
+    return deliveries.iloc[start:stop]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the player index of every season file")
+    parser.add_argument('--dataset-folder', default='IPL_dataset',
+                        help="folder containing the IPL*.csv season files")
+    args = parser.parse_args(argv)
+    
+    for csv_file in find_season_files(args.dataset_folder):
+        start = time.perf_counter()
+        index = load_player_index(csv_file)
+        print(f"{season_name(csv_file)}: {len(index['rows'])} players indexed in "
+              f"{time.perf_counter() - start:.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import glob
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from player_store import PLAYER_FILE_PATTERN, parse_player_file, read_player_files
+
+def find_player_files(player_name=None, pattern=None, root='players'):
+    """
+    Per-player season files under root (searched recursively), either all
+    of them, those of one player (e.g. "SP Narine" or "SP_Narine") or those
+    matching a glob pattern. Sorted by player and season.
+    """
+    if pattern is None:
+        prefix = player_name.replace(' ', '_') if player_name else '*'
+        pattern = f"{prefix}_IPL*.csv"
+    files = glob.glob(os.path.join(root, '**', pattern), recursive=True)
+    files = [f for f in files if PLAYER_FILE_PATTERN.search(os.path.basename(f))]
+    # The same file name can sit in several folders; keep the first one found
+    unique = {}
+    for csv_file in sorted(files):
+        unique.setdefault(os.path.basename(csv_file), csv_file)
+    return sorted(unique.values(), key=lambda f: parse_player_file(f))
+
+def load_player_files(csv_files=None, player_name=None, pattern=None, root='players',
+                      store=None, max_workers=None):
+    """
+    Load per-player season CSVs into one DataFrame with categorical
+    'season' (e.g. "IPL2012") and 'player_name' (e.g. "SP Narine") columns.
+    
+    Files are given explicitly or discovered with find_player_files. They are
+    read concurrently on a thread pool (or looked up in a consolidated store,
+    see player_store.py) and combined with a single concatenation, keeping
+    the order of csv_files.
+    """
+    if csv_files is None:
+        csv_files = find_player_files(player_name, pattern, root)
+    if not csv_files:
+        raise ValueError("No player files to load")
+    labels = [parse_player_file(csv_file) for csv_file in csv_files]
+    
+    if store is not None:
+        dataframes = [df.drop(columns='season') for df in read_player_files(store, csv_files)]
+    else:
+        max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            dataframes = list(executor.map(pd.read_csv, csv_files))
+    
+    combined_df = pd.concat(dataframes, ignore_index=True)
+    lengths = [len(df) for df in dataframes]
+    
+    # Attach the labels as categoricals built from per-file codes, without
+    # materialising one string per row
+    for column, values in (('player_name', [player for player, _ in labels]),
+                           ('season', [season for _, season in labels])):
+        categories = sorted(set(values))
+        category_codes = {category: code for code, category in enumerate(categories)}
+        codes = np.repeat([category_codes[value] for value in values], lengths)
+        combined_df[column] = pd.Categorical.from_codes(codes, categories=categories)
+    return combined_df
@@ -0,0 +1,202 @@
+import argparse
+import os
+import pickle
+import re
+import time
+import numpy as np
+import pandas as pd
+from deliveries_cache import _source_signature, dataset_signature, find_season_files, load_deliveries, season_name
+from generate_player_stats import columns_order, get_season_match_stats
+
+# Default location of the consolidated store
+STORE_FILE = os.path.join('players', 'player_store.pkl')
+
+# Bump when the store layout changes
+STORE_VERSION = 2
+
+# Per-player file names, e.g. "SP_Narine_IPL2012.csv"
+PLAYER_FILE_PATTERN = re.compile(r'(?P<player>.+)_(?P<season>IPL(?P<year>\d{4}))\.csv$')
+
+def normalize_player_name(player_name):
+    """Player name as stored, e.g. "SP Narine" for both "SP Narine" and "SP_Narine" """
+    return player_name.replace('_', ' ')
+
+def parse_player_file(csv_file):
+    """(player, season) of a per-player file name, e.g. ("SP Narine", "IPL2012")"""
+    match = PLAYER_FILE_PATTERN.search(os.path.basename(csv_file))
+    if match is None:
+        raise ValueError(f"Not a per-player season file: {csv_file}")
+    return normalize_player_name(match.group('player')), match.group('season')
+
+def _index_store(frame, sources):
+    """
+    Sort the rows by player and season and record each player's row range.
+    sources are the signatures of what the rows were built from, see
+    is_store_current.
+    """
+    frame = frame.sort_values(['player', 'year'], kind='stable').reset_index(drop=True)
+    frame['player'] = frame['player'].astype('category')
+    frame['season'] = frame['season'].astype('category')
+    
+    players = frame['player'].astype(object).to_numpy()
+    starts = np.flatnonzero(np.r_[True, players[1:] != players[:-1]]) if len(players) else np.array([], dtype=int)
+    stops = np.r_[starts[1:], len(players)]
+    offsets = {players[start]: (int(start), int(stop)) for start, stop in zip(starts, stops)}
+    return {'version': STORE_VERSION, 'frame': frame, 'offsets': offsets, 'sources': sources}
+
+def _dataset_sources(dataset_folder):
+    return {'dataset_folder': dataset_folder, 'signature': dataset_signature(dataset_folder)}
+
+def _season_rows(csv_file):
+    """Per-match rows of every player in one ball-by-ball season file"""
+    season_stats = get_season_match_stats(load_deliveries(csv_file))
+    season = season_name(csv_file)
+    season_stats.insert(1, 'season', season)
+    season_stats.insert(2, 'year', int(season[-4:]))
+    return season_stats
+
+def build_player_store(dataset_folder='IPL_dataset'):
+    """Build the store of every player's per-match rows from the ball-by-ball files"""
+    frame = pd.concat([_season_rows(csv_file) for csv_file in find_season_files(dataset_folder)],
+                      ignore_index=True)
+    return _index_store(frame, _dataset_sources(dataset_folder))
+
+def build_player_store_from_files(csv_files):
+    """Build the store from existing per-player CSVs such as those under players/"""
+    frames = []
+    for csv_file in csv_files:
+        player, season = parse_player_file(csv_file)
+        df = pd.read_csv(csv_file)
+        df.insert(0, 'player', player)
+        df.insert(1, 'season', season)
+        df.insert(2, 'year', int(season[-4:]))
+        frames.append(df)
+    frame = pd.concat(frames, ignore_index=True)
+    frame = frame.drop_duplicates(['player', 'season', 'match_id'])
+    return _index_store(frame, {'files': {os.path.abspath(csv_file): _source_signature(csv_file)
+                                          for csv_file in csv_files}})
+
+def save_player_store(store, store_file=STORE_FILE):
+    os.makedirs(os.path.dirname(store_file) or '.', exist_ok=True)
+    with open(store_file, 'wb') as f:
+        pickle.dump(store, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+def _read_store(store_file):
+    if not os.path.exists(store_file):
+        return None
+    with open(store_file, 'rb') as f:
+        store = pickle.load(f)
+    if store.get('version') != STORE_VERSION:
+        return None
+    return store
+
+def is_store_current(store):
+    """
+    Whether the files a store was built from are unchanged: every season
+    file of its dataset folder, or every per-player CSV it was built from
+    """
+    sources = store['sources']
+    if 'files' in sources:
+        return all(os.path.exists(csv_file) and _source_signature(csv_file) == signature
+                   for csv_file, signature in sources['files'].items())
+    return os.path.isdir(sources['dataset_folder']) and \
+        dataset_signature(sources['dataset_folder']) == sources['signature']
+
+def load_player_store(store_file=STORE_FILE):
+    """
+    Load the consolidated store, or return None if it has not been built or
+    the files it was built from have changed since
+    """
+    store = _read_store(store_file)
+    if store is None or not is_store_current(store):
+        return None
+    return store
+
+def update_store_season(csv_file, store_file=STORE_FILE):
+    """
+    Replace the rows of one season in a saved store built from the
+    ball-by-ball files with those of the season file as it is now (e.g.
+    after matches were appended to it). The store is left alone when it was
+    built from other files or another of its season files changed too.
+    Returns whether the store was updated.
+    """
+    store = _read_store(store_file)
+    if store is None or 'dataset_folder' not in store['sources']:
+        return False
+    dataset_folder = store['sources']['dataset_folder']
+    if os.path.abspath(os.path.dirname(csv_file)) != os.path.abspath(dataset_folder):
+        return False
+    season = season_name(csv_file)
+    current = dataset_signature(dataset_folder)
+    stored = store['sources']['signature']
+    if any(current.get(name) != signature for name, signature in stored.items() if name != os.path.basename(csv_file)):
+        return False
+    
+    frame = store['frame'].astype({'player': str, 'season': str})
+    frame = pd.concat([frame[(frame['season'] != season).to_numpy()], _season_rows(csv_file)], ignore_index=True)
+    save_player_store(_index_store(frame, _dataset_sources(dataset_folder)), store_file)
+    return True
+
+def get_player_rows(store, player_name, first_season=None, last_season=None):
+    """
+    Per-match rows of a player, optionally limited to a range of seasons
+    (given as years or as 'IPL2012'-style labels, both ends inclusive).
+    """
+    player_name = normalize_player_name(player_name)
+    if player_name not in store['offsets']:
+        return store['frame'].iloc[0:0]
+    start, stop = store['offsets'][player_name]
+    years = store['frame']['year'].to_numpy()[start:stop]
+    if first_season is not None:
+        start += int(np.searchsorted(years, int(str(first_season)[-4:]), side='left'))
+    if last_season is not None:
+        stop = store['offsets'][player_name][0] + int(np.searchsorted(years, int(str(last_season)[-4:]), side='right'))
+    return store['frame'].iloc[start:stop]
+
+def read_player_files(store, csv_files):
+    """
+    Rows of the given per-player file names (e.g. "SP_Narine_IPL2012.csv")
+    looked up in the store, one DataFrame per file with the file's columns
+    plus 'season', in place of opening the files. The store stands in for a
+    file only when the file does not exist, or when the store was built
+    from that very file and it is unchanged since; any other file (e.g.
+    edited, copied or appended to by generate_player_stats --update) is read
+    itself, as is a player-season missing from the store.
+    """
+    built_from = store['sources'].get('files', {})
+    dataframes = []
+    for csv_file in csv_files:
+        player, season = parse_player_file(csv_file)
+        use_store = not os.path.exists(csv_file) or \
+            built_from.get(os.path.abspath(csv_file)) == _source_signature(csv_file)
+        df = get_player_rows(store, player, season, season) if use_store else store['frame'].iloc[0:0]
+        if df.empty:
+            df = pd.read_csv(csv_file)
+            df['season'] = season
+        else:
+            df = df[columns_order + ['season']].reset_index(drop=True)
+            df['season'] = df['season'].astype(str)
+        dataframes.append(df)
+    return dataframes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the consolidated player-season store")
+    parser.add_argument('--dataset-folder', default='IPL_dataset',
+                        help="folder containing the IPL*.csv season files")
+    parser.add_argument('--from-files', nargs='*', default=None,
+                        help="build from these per-player CSVs instead of the ball-by-ball files")
+    parser.add_argument('--output', default=STORE_FILE,
+                        help="file to write the store to")
+    args = parser.parse_args(argv)
+    
+    start = time.perf_counter()
+    if args.from_files:
+        store = build_player_store_from_files(args.from_files)
+    else:
+        store = build_player_store(args.dataset_folder)
+    save_player_store(store, args.output)
+    print(f"Stored {len(store['frame'])} rows of {len(store['offsets'])} players in {args.output} "
+          f"({time.perf_counter() - start:.2f}s)")
+
+if __name__ == "__main__":
+    main()
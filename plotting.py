@@ -0,0 +1,131 @@
+import colorsys
+import os
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+import numpy as np
+from cycler import cycler
+
+# Plotting backend of the dashboard modules:
+#   'matplotlib' - draw directly with matplotlib primitives (default, fast)
+#   'seaborn'    - draw through sns.lineplot / sns.barplot
+# Select with the IPL_PLOT_BACKEND environment variable or set_backend().
+BACKENDS = ('matplotlib', 'seaborn')
+_backend = os.environ.get('IPL_PLOT_BACKEND', 'matplotlib')
+
+# rcParams that sns.set_theme() applies on top of matplotlib's default
+# style (darkgrid style, notebook context, deep palette)
+SEABORN_DARKGRID_RC = {
+    'axes.axisbelow': True,
+    'axes.edgecolor': 'white',
+    'axes.facecolor': '#EAEAF2',
+    'axes.grid': True,
+    'axes.labelcolor': '.15',
+    'axes.labelsize': 12.0,
+    'axes.linewidth': 1.25,
+    'axes.prop_cycle': cycler('color', [
+        '#4C72B0', '#DD8452', '#55A868', '#C44E52', '#8172B3',
+        '#937860', '#DA8BC3', '#8C8C8C', '#CCB974', '#64B5CD'
+    ]),
+    'axes.titlesize': 12.0,
+    'font.sans-serif': ['Arial', 'DejaVu Sans', 'Liberation Sans', 'Bitstream Vera Sans', 'sans-serif'],
+    'font.size': 12.0,
+    'grid.color': 'white',
+    'grid.linewidth': 1.0,
+    'legend.fontsize': 11.0,
+    'legend.title_fontsize': 12.0,
+    'lines.solid_capstyle': 'round',
+    'patch.edgecolor': 'w',
+    'patch.force_edgecolor': True,
+    'text.color': '.15',
+    'xtick.bottom': False,
+    'xtick.color': '.15',
+    'xtick.labelsize': 11.0,
+    'xtick.major.size': 6.0,
+    'xtick.major.width': 1.25,
+    'xtick.minor.size': 4.0,
+    'xtick.minor.width': 1.0,
+    'ytick.color': '.15',
+    'ytick.labelsize': 11.0,
+    'ytick.left': False,
+    'ytick.major.size': 6.0,
+    'ytick.major.width': 1.25,
+    'ytick.minor.size': 4.0,
+    'ytick.minor.width': 1.0
+}
+
+# Theme the rcParams were last set to by apply_theme, to skip repeats
+_current_theme = None
+
+def set_backend(backend):
+    """Select the plotting backend ('matplotlib' or 'seaborn')"""
+    global _backend, _current_theme
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown plotting backend: {backend}")
+    _backend = backend
+    _current_theme = None
+
+def get_backend():
+    return _backend
+
+def apply_theme(theme='darkgrid'):
+    """
+    Set the dashboard style: 'darkgrid' for seaborn's default theme, or
+    'default' for matplotlib's default style. The seaborn backend applies
+    the theme on every call as the dashboards always did; the matplotlib
+    backend only updates rcParams when the theme actually changes.
+    """
+    global _current_theme
+    if _backend == 'seaborn':
+        import seaborn as sns
+        plt.style.use('default')
+        if theme == 'darkgrid':
+            sns.set_theme()
+        return
+    if theme == _current_theme:
+        return
+    plt.style.use('default')
+    if theme == 'darkgrid':
+        mpl.rcParams.update(SEABORN_DARKGRID_RC)
+    _current_theme = theme
+
+def _desaturate(color, proportion):
+    """Reduce the saturation of a colour the way seaborn's barplot does"""
+    h, l, s = colorsys.rgb_to_hls(*mpl.colors.to_rgb(color))
+    return colorsys.hls_to_rgb(h, l, s * proportion)
+
+def lineplot(ax, data, x, y, color, marker='o'):
+    """Line with markers through one y value per x, like sns.lineplot"""
+    if _backend == 'seaborn':
+        import seaborn as sns
+        sns.lineplot(data=data, x=x, y=y, color=color, marker=marker, ax=ax)
+        return
+    # Like seaborn, skip missing and infinite points so the line joins
+    # across them, with the same look as sns.lineplot with marker='o'
+    points = data[[x, y]].replace([np.inf, -np.inf], np.nan).dropna()
+    ax.plot(points[x].to_numpy(), points[y].to_numpy(), color=color, marker=marker,
+            markeredgecolor='white', markeredgewidth=0.75)
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+
+def formline(ax, x, values, label):
+    """Dashed rolling-form line over a panel's per-innings series"""
+    x, values = np.asarray(x, dtype=float), np.asarray(values, dtype=float)
+    shown = np.isfinite(values)
+    ax.plot(x[shown], values[shown], color='dimgray', linestyle='--', linewidth=1.5, label=label)
+
+def barplot(ax, data, x, y, color):
+    """One bar per category, like sns.barplot on one y value per x"""
+    if _backend == 'seaborn':
+        import seaborn as sns
+        sns.barplot(data=data, x=x, y=y, color=color, ax=ax)
+        return
+    labels = data[x].astype(str).to_numpy()
+    positions = np.arange(len(labels))
+    # seaborn draws the bars at 0..n-1 in a desaturated shade of the colour
+    # and turns the grid off along the categorical axis
+    ax.bar(positions, data[y].to_numpy(), width=0.8, color=_desaturate(color, 0.75))
+    ax.set_xticks(positions, labels)
+    ax.set_xlim(-0.5, len(labels) - 0.5)
+    ax.xaxis.grid(False)
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
@@ -1,73 +1,103 @@
-import pandas as pd
+import argparse
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_squared_error, r2_score
+import pandas as pd
+from forecast import ROLE_FORECASTS, forecast_players
+from forecast_intervals import DEFAULT_CONFIDENCE, DEFAULT_RESAMPLES, bootstrap_forecasts
+from league_ranks import RANKED_METRICS, load_league_ranks, player_percentiles
+from metrics import boundary_rate
+from player_loader import load_player_files
+from player_store import load_player_store
+from season_metrics import compute_season_metrics
 
-def load_player_data(player_files):
+def load_player_data(player_files, store=None):
     """Load and combine multiple season data for a player"""
-    dfs = []
-    for file in player_files:
-        df = pd.read_csv(file)
-        season = file.split('_')[-1].replace('.csv', '')
-        df['season'] = season
-        dfs.append(df)
-    return pd.concat(dfs, ignore_index=True)
+    return load_player_files(player_files, store=store)
+
+# Season statistics reported for batsmen and bowlers, in print order:
+# name shown -> column of season_metrics.compute_season_metrics
+BATTING_STATS = {
+    'matches': 'matches',
+    'total_runs': 'total_runs',
+    'avg_runs': 'avg_runs',
+    'total_balls': 'total_balls_played',
+    'strike_rate': 'strike_rate',
+    'fifties': 'fifties',
+    'hundreds': 'hundreds',
+    'fours': 'fours',
+    'sixes': 'sixes',
+    'highest_score': 'highest_score',
+    'ducks': 'ducks',
+    'not_outs': 'not_outs',
+    'avg_position': 'avg_position'
+}
+BOWLING_STATS = {
+    'matches': 'matches',
+    'total_wickets': 'total_wickets',
+    'avg_wickets': 'avg_wickets',
+    'economy_rate': 'economy_rate',
+    'total_overs': 'total_overs',
+    'dot_balls': 'dot_balls',
+    'dot_ball_percentage': 'dot_ball_percentage',
+    'best_figures': 'best_figures',
+    'three_wicket_hauls': 'three_wicket_hauls',
+    'five_wicket_hauls': 'five_wicket_hauls',
+    'avg_economy': 'avg_economy'
+}
+
+def calculate_seasons_stats(df, is_batsman=True):
+    """
+    Season-wise statistics of a player's rows, in the order the seasons
+    first appear: a list of (season, stats dict) computed in one grouped pass
+    """
+    columns = BATTING_STATS if is_batsman else BOWLING_STATS
+    metrics = compute_season_metrics(df, by='season', sort=False)
+    table = metrics[list(columns.values())].set_axis(list(columns), axis=1)
+    return list(zip(metrics['season'], table.to_dict('records')))
 
 def calculate_season_stats(df, is_batsman=True):
     """Calculate season-wise statistics"""
-    if is_batsman:
-        season_stats = {
-            'matches': len(df),
-            'total_runs': df['total_runs'].sum(),
-            'avg_runs': df['total_runs'].mean(),
-            'total_balls': df['balls_played'].sum(),
-            'strike_rate': (df['total_runs'].sum() / df['balls_played'].sum()) * 100 if df['balls_played'].sum() > 0 else 0,
-            'fifties': len(df[df['total_runs'] >= 50]),
-            'hundreds': len(df[df['total_runs'] >= 100]),
-            'fours': df['fours'].sum(),
-            'sixes': df['sixes'].sum(),
-            'highest_score': df['total_runs'].max(),
-            'ducks': len(df[df['total_runs'] == 0]),
-            'not_outs': len(df[df['dismissed'] == False]),
-            'avg_position': df['batting_position'].mean()
-        }
-    else:
-        total_overs = df['balls_bowled'].sum() / 6
-        season_stats = {
-            'matches': len(df),
-            'total_wickets': df['wickets_taken'].sum(),
-            'avg_wickets': df['wickets_taken'].mean(),
-            'economy_rate': df['runs_conceded'].sum() / total_overs if total_overs > 0 else 0,
-            'total_overs': total_overs,
-            'dot_balls': df['dot_balls'].sum(),
-            'dot_ball_percentage': (df['dot_balls'].sum() / df['balls_bowled'].sum()) * 100 if df['balls_bowled'].sum() > 0 else 0,
-            'best_figures': f"{df['wickets_taken'].max()}/{df.loc[df['wickets_taken'].idxmax(), 'runs_conceded']}",
-            'three_wicket_hauls': len(df[df['wickets_taken'] >= 3]),
-            'five_wicket_hauls': len(df[df['wickets_taken'] >= 5]),
-            'avg_economy': df['bowling_economy'].mean()
-        }
-    return season_stats
+    return calculate_seasons_stats(df.assign(season=''), is_batsman)[0][1]
+
+def print_league_percentiles(league_ranks, player, season, is_batsman=True):
+    """Print where a player-season ranks in the league (see league_ranks.py)"""
+    percentiles = player_percentiles(league_ranks, player, str(season))
+    if percentiles is None:
+        return
+    role = 'batting' if is_batsman else 'bowling'
+    print("League Percentiles:")
+    for metric, _, metric_role in RANKED_METRICS:
+        if metric_role == role and not np.isnan(percentiles[metric]):
+            print(f"  {metric.replace('_', ' ').title()}: {percentiles[metric]:.1f}")
 
-def predict_season_performance(player_files, is_batsman=True, player_name=""):
-    """Predict and analyze season-wise performance"""
+def print_forecast(label, forecast, intervals, column, confidence):
+    """Print a forecast with its bootstrap interval"""
+    print(f"{label}: {forecast[column]:.2f} ({confidence * 100:.0f}% interval: "
+          f"{intervals[f'{column}_low']:.2f} - {intervals[f'{column}_high']:.2f})")
+
+def predict_season_performance(player_files, is_batsman=True, player_name="", store=None, league_ranks=None,
+                               resamples=DEFAULT_RESAMPLES, confidence=DEFAULT_CONFIDENCE, seed=None,
+                               time_budget=None):
+    """
+    Predict and analyze season-wise performance. With league_ranks (from
+    league_ranks.load_league_ranks) each season is also ranked against the
+    whole league. Each prediction comes with a bootstrap interval over the
+    player's matches (see forecast_intervals.py) of the given confidence.
+    """
     print(f"\nAnalyzing {player_name}'s Season-wise Performance")
     print("-" * 60)
     
     # Load and process data
-    all_data = load_player_data(player_files)
-    seasons = all_data['season'].unique()
+    all_data = load_player_data(player_files, store)
     
     # Calculate and display season-wise stats
     print("\nSeason-wise Statistics:")
     print("-" * 40)
     
     season_stats_list = []
-    for season in seasons:
-        season_data = all_data[all_data['season'] == season]
-        stats = calculate_season_stats(season_data, is_batsman)
+    seasons = []
+    for season, stats in calculate_seasons_stats(all_data, is_batsman):
         season_stats_list.append(stats)
+        seasons.append(season)
         
         print(f"\nSeason {season}:")
         for key, value in stats.items():
@@ -75,6 +105,8 @@ def predict_season_performance(player_files, is_batsman=True, player_name=""):
                 print(f"{key.replace('_', ' ').title()}: {value:.2f}")
             else:
                 print(f"{key.replace('_', ' ').title()}: {value}")
+        if league_ranks is not None:
+            print_league_percentiles(league_ranks, all_data['player_name'].iloc[0], season, is_batsman)
     
     # Calculate career averages
     print("\nCareer Averages:")
@@ -86,7 +118,7 @@ def predict_season_performance(player_files, is_batsman=True, player_name=""):
             'Career Strike Rate': np.mean([stats['strike_rate'] for stats in season_stats_list]),
             'Runs per Season': np.mean([stats['total_runs'] for stats in season_stats_list]),
             'Average Position': np.mean([stats['avg_position'] for stats in season_stats_list]),
-            'Boundary Rate': np.mean([(stats['fours'] + stats['sixes'])/stats['matches'] for stats in season_stats_list])
+            'Boundary Rate': np.mean([boundary_rate(stats['fours'], stats['sixes'], stats['matches']) for stats in season_stats_list])
         }
     else:
         career_stats = {
@@ -103,26 +135,20 @@ def predict_season_performance(player_files, is_batsman=True, player_name=""):
     print("\nPredicted Performance for Next Season:")
     print("-" * 40)
     
+    # Exponentially weighted averages of the seasons (see forecast.py)
+    season_table = pd.DataFrame(season_stats_list).assign(player=player_name, season=seasons)
+    role_forecasts = ROLE_FORECASTS['batting' if is_batsman else 'bowling']
+    forecast = forecast_players(season_table, forecasts=role_forecasts).iloc[0]
+    intervals, _ = bootstrap_forecasts(all_data, by=None, forecasts=role_forecasts, n_resamples=resamples,
+                                       confidence=confidence, seed=seed, time_budget=time_budget, sort=False)
+    intervals = intervals.iloc[0]
     if is_batsman:
-        # Use exponential weighted averages for prediction
-        predicted_runs = np.average([stats['avg_runs'] for stats in season_stats_list], 
-                                  weights=np.exp(range(len(season_stats_list))))
-        predicted_runs = predicted_runs + 5
-        predicted_sr = np.average([stats['strike_rate'] for stats in season_stats_list],
-                                weights=np.exp(range(len(season_stats_list))))
-        
-        print(f"Predicted Average Runs: {predicted_runs:.2f}")
-        print(f"Predicted Strike Rate: {predicted_sr:.2f}")
-        
+        print_forecast("Predicted Average Runs", forecast, intervals, 'predicted_avg_runs', confidence)
+        print_forecast("Predicted Strike Rate", forecast, intervals, 'predicted_strike_rate', confidence)
+    
     else:
-        predicted_wickets = np.average([stats['avg_wickets'] for stats in season_stats_list],
-                                     weights=np.exp(range(len(season_stats_list))))
-        predicted_wickets = predicted_wickets + 0.3
-        predicted_economy = np.average([stats['economy_rate'] for stats in season_stats_list],
-                                     weights=np.exp(range(len(season_stats_list))))
-        
-        print(f"Predicted Wickets per Match: {predicted_wickets:.2f}")
-        print(f"Predicted Economy Rate: {predicted_economy:.2f}")
+        print_forecast("Predicted Wickets per Match", forecast, intervals, 'predicted_avg_wickets', confidence)
+        print_forecast("Predicted Economy Rate", forecast, intervals, 'predicted_economy_rate', confidence)
 
 # Example usage
 sp_narine_files = ['SP_Narine_IPL2017.csv', 'SP_Narine_IPL2018.csv', 'SP_Narine_IPL2024.csv']
@@ -138,25 +164,60 @@ jj_bumrah_files = ['JJ_Bumrah_IPL2021.csv', 'JJ_Bumrah_IPL2022.csv', 'JJ_Bumrah_
 lh_ferguson_files = ['LH_Ferguson_IPL2022.csv', 'LH_Ferguson_IPL2023.csv', 'LH_Ferguson_IPL2024.csv']
 g_coetzee_files = ['G_Coetzee_IPL2024.csv']
 
-# Analyze players
-
-#------------batsman---------------------
-predict_season_performance(ashutosh_sharma_files, is_batsman=True, player_name="ashutosh_sharma_files")
-predict_season_performance(rd_gaikwad_files, is_batsman=True, player_name="rd_gaikwad_files")
-predict_season_performance(abishek_porel_files, is_batsman=True, player_name="abishek_porel_files")
-predict_season_performance(sa_yadav_files, is_batsman=True, player_name="sa_yadav_files")
-predict_season_performance(c_green_files, is_batsman=True, player_name="c_green_files")
-predict_season_performance(sp_narine_files, is_batsman=True, player_name="sp_narine_files")
-predict_season_performance(sm_curran_files, is_batsman=True, player_name="sm_curran_files")
-predict_season_performance(mohammad_nabi_files, is_batsman=True, player_name="mohammad_nabi_files")
+# Players analysed by default: (files, is_batsman, player_name)
+EXAMPLE_ANALYSES = [
+    #------------batsman---------------------
+    (ashutosh_sharma_files, True, "ashutosh_sharma_files"),
+    (rd_gaikwad_files, True, "rd_gaikwad_files"),
+    (abishek_porel_files, True, "abishek_porel_files"),
+    (sa_yadav_files, True, "sa_yadav_files"),
+    (c_green_files, True, "c_green_files"),
+    (sp_narine_files, True, "sp_narine_files"),
+    (sm_curran_files, True, "sm_curran_files"),
+    (mohammad_nabi_files, True, "mohammad_nabi_files"),
+    
+    #---------------bowler--------------------------
+    (g_coetzee_files, False, "g_coetzee_files"),
+    (lh_ferguson_files, False, "lh_ferguson_files"),
+    (jj_bumrah_files, False, "jj_bumrah_files"),
+    (pp_chawla_files, False, "pp_chawla_files"),
+    (mohammad_nabi_files, False, "mohammad_nabi_files"),
+    (sm_curran_files, False, "sm_curran_files"),
+    (c_green_files, False, "c_green_files"),
+    (sp_narine_files, False, "sp_narine_files")
+]
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Season-wise statistics and next-season prediction of players")
+    parser.add_argument('files', nargs='*',
+                        help="per-player season CSVs of one player (default: the example players above)")
+    parser.add_argument('--bowler', action='store_true',
+                        help="analyse the given files as a bowler instead of a batsman")
+    parser.add_argument('--name', default='',
+                        help="player name to print for the given files")
+    parser.add_argument('--league', action='store_true',
+                        help="also rank each season against every player in the league")
+    parser.add_argument('--resamples', type=int, default=DEFAULT_RESAMPLES,
+                        help="bootstrap resamples of each prediction interval")
+    parser.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE,
+                        help="confidence of the prediction intervals")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="random seed, for reproducible intervals")
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help="seconds to spend resampling each player at most")
+    args = parser.parse_args(argv)
+    
+    analyses = EXAMPLE_ANALYSES
+    if args.files:
+        analyses = [(args.files, not args.bowler, args.name)]
+    
+    # Analyze players
+    store = load_player_store()
+    league_ranks = load_league_ranks() if args.league else None
+    for player_files, is_batsman, player_name in analyses:
+        predict_season_performance(player_files, is_batsman=is_batsman, player_name=player_name, store=store,
+                                   league_ranks=league_ranks, resamples=args.resamples, confidence=args.confidence,
+                                   seed=args.seed, time_budget=args.time_budget)
 
-#---------------bowler--------------------------
-predict_season_performance(g_coetzee_files, is_batsman=False, player_name="g_coetzee_files") 
-predict_season_performance(lh_ferguson_files, is_batsman=False, player_name="lh_ferguson_files") 
-predict_season_performance(jj_bumrah_files, is_batsman=False, player_name="jj_bumrah_files") 
-predict_season_performance(pp_chawla_files, is_batsman=False, player_name="pp_chawla_files") 
-predict_season_performance(mohammad_nabi_files, is_batsman=False, player_name="mohammad_nabi_files") 
-predict_season_performance(sm_curran_files, is_batsman=False, player_name="sm_curran_files") 
-predict_season_performance(c_green_files, is_batsman=False, player_name="c_green_files") 
-predict_season_performance(sp_narine_files, is_batsman=False, player_name="sp_narine_files") 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import hashlib
+import json
+import os
+import pandas as pd
+import plotting
+
+# Folder, next to the rendered images, holding the key of each image
+CACHE_FOLDER = '.render_cache'
+
+# Layout version of each dashboard kind. Bump a kind's version when its
+# layout (or anything it plots that is not in its data) changes, so that
+# cached images are redrawn.
+DASHBOARD_VERSIONS = {
+    'bowler_dashboard': 2,
+    'overall_bowler_dashboard': 3,
+    'overall_batsman_dashboard': 3,
+    'season_batsman_dashboard': 1,
+    'season_bowler_dashboard': 1,
+    'summary_bowler_dashboard': 1
+}
+
+def render_key(kind, data, **params):
+    """
+    Content key of a dashboard: the hash of the metrics it plots (and of
+    the columns anything drawn is computed from, such as the rolling form)
+    plus the dashboard kind, its layout version (DASHBOARD_VERSIONS), the
+    plotting backend and any other parameter that changes the picture
+    (titles, dpi, ...).
+    """
+    sha1 = hashlib.sha1()
+    sha1.update(json.dumps({'kind': kind, 'version': DASHBOARD_VERSIONS[kind], 'backend': plotting.get_backend(),
+                            'params': params},
+                           sort_keys=True, default=str).encode())
+    sha1.update(json.dumps(list(map(str, data.columns))).encode())
+    sha1.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return sha1.hexdigest()
+
+def _key_file(output_file):
+    folder, name = os.path.split(output_file)
+    return os.path.join(folder, CACHE_FOLDER, name + '.key')
+
+def is_render_current(output_file, key):
+    """Check whether output_file exists and was rendered from the same key"""
+    key_file = _key_file(output_file)
+    if not (os.path.exists(output_file) and os.path.exists(key_file)):
+        return False
+    with open(key_file) as f:
+        return f.read().strip() == key
+
+def record_render(output_file, key):
+    """Remember the key output_file was rendered from"""
+    key_file = _key_file(output_file)
+    os.makedirs(os.path.dirname(key_file), exist_ok=True)
+    with open(key_file, 'w') as f:
+        f.write(key)
@@ -0,0 +1,134 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from output_profiles import PROFILES
+from player_loader import find_player_files
+from player_store import parse_player_file
+
+# Dashboard kinds the farm can render:
+#   bowler                 - one season, graph2.create_bowler_dashboard
+#   season_batsman         - all seasons, season_wise_batsman.create_combined_dashboard
+#   season_bowler          - all seasons, season_wise_bowler.create_combined_dashboard
+#   overall_bowler/batsman - all seasons, overall_stats_graphs dashboards
+# Batches are rendered as thumbnails by default; full resolution images are
+# rendered on demand with --profile full (see output_profiles.py).
+PER_SEASON_KINDS = ['bowler']
+PER_PLAYER_KINDS = ['season_batsman', 'season_bowler', 'overall_bowler', 'overall_batsman']
+
+# Folder the worker processes look the per-player files up in
+_players_root = 'players'
+
+def _init_worker(players_root):
+    """Run the workers headless so that rendering never needs a display"""
+    global _players_root
+    _players_root = players_root
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+def discover_jobs(kinds=('bowler',), root='players'):
+    """
+    (player, season, kind) jobs for every per-player file under root.
+    Multi-season kinds get one job per player with season None.
+    """
+    jobs = []
+    players = {}
+    for csv_file in find_player_files(root=root):
+        player, season = parse_player_file(csv_file)
+        players.setdefault(player, None)
+        jobs.extend((player, season, kind) for kind in kinds if kind in PER_SEASON_KINDS)
+    for player in players:
+        jobs.extend((player, None, kind) for kind in kinds if kind in PER_PLAYER_KINDS)
+    return jobs
+
+def render_job(job, force=False, profile='full'):
+    """Render one (player, season, kind) job and return the main image path"""
+    player, season, kind = job
+    csv_files = find_player_files(player, root=_players_root)
+    if season is not None:
+        csv_files = [f for f in csv_files if parse_player_file(f)[1] == season]
+    if not csv_files:
+        raise ValueError(f"No files for {player} {season or ''}".strip())
+    
+    if kind == 'bowler':
+        import graph2
+        return graph2.create_bowler_dashboard(csv_files[0], f"{player} {season}", force=force, profile=profile)
+    
+    if kind in ('season_batsman', 'season_bowler'):
+        if kind == 'season_batsman':
+            import season_wise_batsman as season_wise
+        else:
+            import season_wise_bowler as season_wise
+        combined_df = season_wise.combine_and_process_files(csv_files)
+        season_metrics = season_wise.calculate_season_metrics(combined_df)
+        return season_wise.create_combined_dashboard(season_metrics, player.replace(' ', '_'), force=force, profile=profile)
+    
+    if kind in ('overall_bowler', 'overall_batsman'):
+        import overall_stats_graphs
+        player_df = overall_stats_graphs.combine_csv_files(csv_files)
+        player_df['serial_order'] = range(1, len(player_df) + 1)
+        if kind == 'overall_bowler':
+            return overall_stats_graphs.create_bowler_dashboard(player_df, player, force=force, profile=profile)
+        return overall_stats_graphs.create_batsman_dashboard(player_df, player, force=force, profile=profile)
+    
+    raise ValueError(f"Unknown dashboard kind: {kind}")
+
+def _timed_render(job, force, profile):
+    start = time.perf_counter()
+    output_file = render_job(job, force, profile)
+    return output_file, time.perf_counter() - start
+
+def render_all(jobs, root='players', max_workers=None, force=False, profile='thumbnails'):
+    """
+    Render the jobs on a process pool (one worker per core by default).
+    A failing job is reported and skipped without stopping the batch.
+    Returns (rendered, failed): lists of (job, output file or error).
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    print(f"Rendering {len(jobs)} dashboards on {max_workers} worker(s)...")
+    
+    start = time.perf_counter()
+    rendered, failed = [], []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(root,)) as executor:
+        futures = {executor.submit(_timed_render, job, force, profile): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            label = ' '.join(str(part) for part in job if part is not None)
+            try:
+                output_file, elapsed = future.result()
+            except Exception as e:
+                print(f"Error rendering {label}: {str(e)}")
+                failed.append((job, str(e)))
+                continue
+            print(f"Created {label}: {output_file} ({elapsed:.2f}s)")
+            rendered.append((job, output_file))
+    
+    print(f"Rendered {len(rendered)} dashboards, {len(failed)} failed, "
+          f"in {time.perf_counter() - start:.2f}s")
+    return rendered, failed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render player dashboards in parallel")
+    parser.add_argument('--root', default='players',
+                        help="folder searched for the per-player season CSVs")
+    parser.add_argument('--kinds', nargs='+', default=['bowler'],
+                        choices=PER_SEASON_KINDS + PER_PLAYER_KINDS,
+                        help="dashboard kinds to render")
+    parser.add_argument('--players', nargs='*', default=None,
+                        help="only render these players (default: every player under --root)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="number of worker processes (default: one per CPU core)")
+    parser.add_argument('--force', action='store_true',
+                        help="redraw dashboards even if their data is unchanged")
+    parser.add_argument('--profile', default='thumbnails', choices=list(PROFILES),
+                        help="output images to render (default: thumbnails; use full for 300 dpi PNGs)")
+    args = parser.parse_args(argv)
+    
+    jobs = discover_jobs(args.kinds, args.root)
+    if args.players:
+        jobs = [job for job in jobs if job[0] in args.players]
+    render_all(jobs, args.root, args.workers, args.force, args.profile)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import argparse
+import time
+from collections import deque
+import numpy as np
+import pandas as pd
+from metrics import safe_divide
+from player_store import build_player_store, load_player_store
+
+# Current form of a player: batting and bowling metrics over their recent
+# innings instead of a whole season. Each metric is a ratio of counter sums,
+# e.g. economy = runs conceded / balls bowled * 6 over the innings in the
+# window, so a short spell weighs less than a full one. Two kinds of form:
+#   form_<metric>    - over the last `window` innings of the role
+#   decayed_<metric> - over all innings, an innings `half_life` innings
+#                      ago weighing half as much as the latest one
+#
+# Batting innings are matches with a ball faced and bowling innings matches
+# with a ball bowled; other matches carry the form forward.
+
+# Counters summed over the innings of each role ('innings' counts them)
+FORM_COUNTERS = {
+    'batting': ['innings', 'total_runs', 'balls_played'],
+    'bowling': ['innings', 'balls_bowled', 'runs_conceded', 'wickets_taken', 'dot_balls']
+}
+
+# Per-match columns the form is computed from, e.g. for render cache keys
+FORM_INPUTS = ['balls_played', 'total_runs', 'balls_bowled', 'runs_conceded', 'wickets_taken', 'dot_balls']
+
+# Form metrics: name -> (role, numerator counter, denominator counter, scale)
+FORM_METRICS = {
+    'runs': ('batting', 'total_runs', 'innings', 1),
+    'strike_rate': ('batting', 'total_runs', 'balls_played', 100),
+    'economy': ('bowling', 'runs_conceded', 'balls_bowled', 6),
+    'wickets': ('bowling', 'wickets_taken', 'innings', 1),
+    'bowling_strike_rate': ('bowling', 'balls_bowled', 'wickets_taken', 1),
+    'dot_ball_percentage': ('bowling', 'dot_balls', 'balls_bowled', 100),
+    'balls_bowled': ('bowling', 'balls_bowled', 'innings', 1)
+}
+
+DEFAULT_WINDOW = 5
+DEFAULT_HALF_LIFE = 5
+
+def _innings_flags(df):
+    """Whether each row is a batting / bowling innings"""
+    return {
+        'batting': (df['balls_played'] > 0).to_numpy(),
+        'bowling': (df['balls_bowled'] > 0).to_numpy()
+    }
+
+def _role_counters(df, role, rows=slice(None)):
+    """(rows, counters) float matrix of a role's counters, 'innings' being 1 per row"""
+    counters = [column for column in FORM_COUNTERS[role] if column != 'innings']
+    values = df[counters].to_numpy(dtype=float)[rows]
+    return np.column_stack([np.ones(len(values)), values])
+
+def _match_counters(match_row, role):
+    """Counters of a role in one match, None if it was not an innings of the role"""
+    if match_row['balls_played' if role == 'batting' else 'balls_bowled'] <= 0:
+        return None
+    return np.array([1.0 if counter == 'innings' else float(match_row[counter])
+                     for counter in FORM_COUNTERS[role]])
+
+def _form_ratios(sums, role):
+    """Form metrics of a role from its counter sums (one row per innings)"""
+    position = {counter: i for i, counter in enumerate(FORM_COUNTERS[role])}
+    return {
+        name: safe_divide(sums[..., position[numerator]], sums[..., position[denominator]], np.nan, scale)
+        for name, (metric_role, numerator, denominator, scale) in FORM_METRICS.items()
+        if metric_role == role
+    }
+
+def rolling_form(df, window=DEFAULT_WINDOW, half_life=DEFAULT_HALF_LIFE, by=None):
+    """
+    Form after every row of per-match rows in match order (e.g. a player's
+    combined season files, or the player store with by='player'). Returns a
+    DataFrame on the index of df with the form_<metric> and decayed_<metric>
+    columns; NaN before a player's first innings of the role or where the
+    denominator is 0 (e.g. bowling strike rate without a wicket).
+    
+    Every series is backfilled at once from cumulative sums: the window sum
+    after innings j is C[j] - C[j - window], and the decayed sum is
+    e^(-k p) * E[j] with E the player's cumulative sum of counters weighted
+    by e^(k p), p the innings' position in the player's history (so careers
+    are limited to about 700 half-lives, far beyond any real one).
+    """
+    n = len(df)
+    groups = np.zeros(n, dtype=np.int64) if by is None else pd.factorize(df[by])[0]
+    # Rows of a player next to each other, each player's rows in match order
+    order = np.argsort(groups, kind='stable')
+    sorted_df = df.iloc[order]
+    sorted_groups = groups[order]
+    decay = np.log(2) / half_life
+    
+    result = {}
+    for role, is_innings in _innings_flags(sorted_df).items():
+        rows = np.flatnonzero(is_innings)
+        values = _role_counters(sorted_df, role, rows)
+        innings_groups = sorted_groups[rows]
+        index = np.arange(len(rows))
+        is_start = np.r_[True, innings_groups[1:] != innings_groups[:-1]] if len(rows) else np.array([], dtype=bool)
+        start = np.maximum.accumulate(np.where(is_start, index, 0)) if len(rows) else index
+        position = index - start
+        
+        cumulative = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+        window_sums = cumulative[index + 1] - cumulative[np.maximum(index + 1 - window, start)]
+        # Cumulated per player: differences of one cumulative sum over all
+        # players would cancel the large weights of long careers
+        weighted = pd.DataFrame(values * np.exp(decay * position)[:, None]).groupby(innings_groups).cumsum()
+        decayed_sums = weighted.to_numpy() * np.exp(-decay * position)[:, None]
+        
+        # Carry each innings' form to the following rows of the same player
+        last = np.maximum.accumulate(np.where(is_innings, np.cumsum(is_innings) - 1, -1))
+        row_start = np.r_[True, sorted_groups[1:] != sorted_groups[:-1]] if n else np.array([], dtype=bool)
+        group_first_innings = np.maximum.accumulate(np.where(row_start, np.cumsum(is_innings) - is_innings, 0))
+        carried = (last >= 0) & (last >= group_first_innings)
+        for prefix, sums in (('form', window_sums), ('decayed', decayed_sums)):
+            for name, values_of_metric in _form_ratios(sums, role).items():
+                column = np.full(n, np.nan)
+                column[carried] = values_of_metric[last[carried]]
+                result[f"{prefix}_{name}"] = column
+    
+    form = pd.DataFrame(result).iloc[np.argsort(order)]
+    form.index = df.index
+    return form
+
+def new_form_state(window=DEFAULT_WINDOW, half_life=DEFAULT_HALF_LIFE):
+    """Empty incremental form of one player, updated by update_form"""
+    return {
+        'window': window,
+        'retention': 0.5 ** (1 / half_life),
+        'recent': {role: deque() for role in FORM_COUNTERS},
+        'window_sums': {role: np.zeros(len(counters)) for role, counters in FORM_COUNTERS.items()},
+        'decayed_sums': {role: np.zeros(len(counters)) for role, counters in FORM_COUNTERS.items()}
+    }
+
+def update_form(state, match_row):
+    """
+    Add one match (a per-match row as a dict or Series) to a player's form
+    state in O(1) and return the form after it as {column: value}, the
+    same columns rolling_form gives for that row
+    """
+    for role in FORM_COUNTERS:
+        counters = _match_counters(match_row, role)
+        if counters is None:
+            continue
+        recent = state['recent'][role]
+        recent.append(counters)
+        state['window_sums'][role] += counters
+        if len(recent) > state['window']:
+            state['window_sums'][role] -= recent.popleft()
+        state['decayed_sums'][role] = state['decayed_sums'][role] * state['retention'] + counters
+    return current_form(state)
+
+def current_form(state):
+    """Form of a player state as {column: value}, NaN for a role without innings"""
+    form = {}
+    for role in FORM_COUNTERS:
+        has_innings = len(state['recent'][role]) > 0
+        for prefix, sums in (('form', state['window_sums'][role]), ('decayed', state['decayed_sums'][role])):
+            for name, value in _form_ratios(sums, role).items():
+                form[f"{prefix}_{name}"] = value if has_innings else np.nan
+    return form
+
+def form_state_from_history(df, window=DEFAULT_WINDOW, half_life=DEFAULT_HALF_LIFE):
+    """
+    Form state of a player after their per-match rows (in match order),
+    computed in one pass over the rows, ready for update_form after the
+    next match
+    """
+    state = new_form_state(window, half_life)
+    for role, is_innings in _innings_flags(df).items():
+        values = _role_counters(df, role, is_innings)
+        recent = values[-window:]
+        state['recent'][role].extend(recent)
+        state['window_sums'][role] = recent.sum(axis=0)
+        ages = np.arange(len(values))[::-1]
+        state['decayed_sums'][role] = (values * (state['retention'] ** ages)[:, None]).sum(axis=0)
+    return state
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write the rolling form of every player after every match")
+    parser.add_argument('--player', default=None,
+                        help="print the current form of this player (e.g. \"SP Narine\") instead of writing the table")
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW,
+                        help="innings in the form window")
+    parser.add_argument('--half-life', type=float, default=DEFAULT_HALF_LIFE,
+                        help="innings after which an innings weighs half in the decayed form")
+    parser.add_argument('--output', default='rolling_form.csv',
+                        help="CSV file to write the table to")
+    args = parser.parse_args(argv)
+    
+    store = load_player_store()
+    if store is None:
+        store = build_player_store()
+    frame = store['frame']
+    
+    start = time.perf_counter()
+    if args.player is not None:
+        rows = frame[frame['player'] == args.player]
+        state = form_state_from_history(rows, args.window, args.half_life)
+        print(f"Form of {args.player} after {len(rows)} matches:")
+        for column, value in current_form(state).items():
+            print(f"  {column.replace('_', ' ').title()}: {value:.2f}")
+        return
+    
+    form = rolling_form(frame, args.window, args.half_life, by='player')
+    print(f"Backfilled the form of {frame['player'].nunique()} players over {len(frame)} matches "
+          f"in {time.perf_counter() - start:.2f}s")
+    table = pd.concat([frame[['player', 'season', 'match_id']], form], axis=1)
+    table.to_csv(args.output, index=False)
+    print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
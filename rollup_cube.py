@@ -0,0 +1,240 @@
+import argparse
+import os
+import pickle
+import time
+import numpy as np
+import pandas as pd
+from deliveries_cache import _source_signature, dataset_signature, duplicate_seasons, load_all_seasons
+from match_dimension import MATCHES_FILE, load_matches, match_positions
+from metrics import (batting_average, batting_strike_rate, bowling_average, bowling_economy,
+                     bowling_strike_rate, dot_ball_percentage, percentage)
+from player_store import normalize_player_name
+
+# Materialized aggregate of the ball-by-ball data. Each row holds additive
+# counters of one player in one role for a (season, opponent, venue, phase)
+# cell, so any slice or roll-up is a filter and a sum over the cube instead
+# of a pass over the deliveries.
+#
+# Counters follow the per-match statistics of generate_player_stats:
+#   batting - balls faced (no wides or no balls), runs off the bat, dots
+#             (balls faced without a run off the bat), wickets (times
+#             dismissed, run outs included), fours and sixes hit;
+#   bowling - legal balls bowled, runs conceded (byes and leg byes
+#             excluded), dot balls, wickets (run outs excluded), fours and
+#             sixes conceded.
+DIMENSIONS = ['player', 'role', 'season', 'opponent', 'venue', 'phase']
+COUNTERS = ['balls', 'runs', 'dots', 'wickets', 'fours', 'sixes']
+
+# Bump when the dimensions, the counters or their definitions change
+CUBE_VERSION = 2
+
+# Match phases by over (0-based): powerplay 1-6, middle 7-15, death 16-20
+PHASES = ['powerplay', 'middle', 'death']
+PHASE_BINS = [-1, 5, 14, np.inf]
+
+# Rates added to a roll-up of a single role: name -> function of the counters
+ROLE_RATES = {
+    'batting': {
+        'strike_rate': lambda t: batting_strike_rate(t['runs'], t['balls']),
+        'average': lambda t: batting_average(t['runs'], t['wickets']),
+        'dot_ball_percentage': lambda t: percentage(t['dots'], t['balls']),
+        'boundary_percentage': lambda t: percentage(t['fours'] + t['sixes'], t['balls'])
+    },
+    'bowling': {
+        'economy_rate': lambda t: bowling_economy(t['runs'], t['balls']),
+        'average': lambda t: bowling_average(t['runs'], t['wickets']),
+        'strike_rate': lambda t: bowling_strike_rate(t['balls'], t['wickets']),
+        'dot_ball_percentage': lambda t: dot_ball_percentage(t['dots'], t['balls'])
+    }
+}
+
+def cube_path(dataset_folder='IPL_dataset'):
+    return os.path.join(dataset_folder, '.cache', 'rollup_cube.pkl')
+
+def build_cube(deliveries, venues):
+    """
+    Aggregate deliveries (e.g. from load_all_seasons) into the cube: one
+    row per (player, role, season, opponent, venue, phase) with the counters
+    of that cell. venues is a Series of venues indexed by match id (e.g. the
+    match_dimension table's); matches missing from it get the venue 'Unknown'.
+    """
+    df = deliveries.reset_index(drop=True)
+    extras = df['extras_type']
+    legal_ball = ~extras.isin(['wides', 'noballs'])
+    off_bat = ~extras.isin(['legbyes', 'byes'])
+    bat_runs = df['batsman_runs'].where(off_bat, 0)
+    four = off_bat & (df['batsman_runs'] == 4)
+    six = off_bat & (df['batsman_runs'] == 6)
+    positions = match_positions(df['match_id'], venues)
+    cells = {
+        'season': df['season'].astype(str),
+        'venue': np.where(positions >= 0, venues.astype(str).to_numpy()[positions], 'Unknown'),
+        'phase': pd.cut(df['over'], PHASE_BINS, labels=PHASES).astype(str)
+    }
+    
+    batting = pd.DataFrame({
+        'player': df['batter'].astype(str),
+        'role': 'batting',
+        'opponent': df['bowling_team'].astype(str),
+        **cells,
+        'balls': legal_ball,
+        'runs': bat_runs,
+        'dots': legal_ball & (bat_runs == 0),
+        'wickets': 0,
+        'fours': four,
+        'sixes': six
+    })
+    # Dismissals count for the player dismissed, who may be the non-striker
+    dismissed = df['player_dismissed'].notna().to_numpy()
+    dismissals = pd.DataFrame({
+        'player': df['player_dismissed'][dismissed].astype(str),
+        'role': 'batting',
+        'opponent': df['bowling_team'][dismissed].astype(str),
+        **{dimension: values[dismissed] for dimension, values in cells.items()},
+        'wickets': 1
+    })
+    bowling = pd.DataFrame({
+        'player': df['bowler'].astype(str),
+        'role': 'bowling',
+        'opponent': df['batting_team'].astype(str),
+        **cells,
+        'balls': legal_ball,
+        'runs': df['total_runs'].where(off_bat, 0),
+        'dots': (df['batsman_runs'] == 0) & extras.isna(),
+        'wickets': (df['is_wicket'] == 1) & (df['dismissal_kind'] != 'run out'),
+        'fours': four,
+        'sixes': six
+    })
+    
+    rows = pd.concat([batting, dismissals, bowling], ignore_index=True)
+    rows[COUNTERS] = rows[COUNTERS].fillna(0).astype('int32')
+    cube = rows.groupby(DIMENSIONS, sort=True)[COUNTERS].sum().reset_index()
+    cube[COUNTERS] = cube[COUNTERS].astype('int32')
+    cube.insert(DIMENSIONS.index('season') + 1, 'year', cube['season'].str[-4:].astype('int16'))
+    for dimension in DIMENSIONS:
+        cube[dimension] = cube[dimension].astype('category')
+    return cube
+
+def load_cube(dataset_folder='IPL_dataset', matches_file=MATCHES_FILE, use_cache=True):
+    """
+    The cube of every season in the dataset folder but the duplicate
+    seasons (copies of an earlier season's file, see
+    deliveries_cache.duplicate_seasons), read from the cache when the season
+    files and the matches file are unchanged and rebuilt otherwise
+    """
+    path = cube_path(dataset_folder)
+    signature = dataset_signature(dataset_folder)
+    signature[os.path.basename(matches_file)] = _source_signature(matches_file)
+    if use_cache and os.path.exists(path):
+        with open(path, 'rb') as f:
+            stored = pickle.load(f)
+        if stored['version'] == CUBE_VERSION and stored['signature'] == signature:
+            return stored['cube']
+    
+    duplicates = duplicate_seasons(dataset_folder)
+    deliveries = load_all_seasons(dataset_folder)
+    deliveries = deliveries[~deliveries['season'].astype(str).isin(list(duplicates)).to_numpy()]
+    cube = build_cube(deliveries, load_matches(matches_file)['venue'])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        pickle.dump({'version': CUBE_VERSION, 'signature': signature, 'excluded': duplicates, 'cube': cube}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    return cube
+
+def slice_cube(cube, first_season=None, last_season=None, **filters):
+    """
+    Rows of the cube matching every filter. Filters are dimensions given a
+    value or a list of values, e.g. player="JJ Bumrah", phase=['middle', 'death'];
+    None leaves a dimension unfiltered. first_season and last_season limit
+    the seasons (years or 'IPL2020'-style labels, both ends inclusive).
+    """
+    mask = np.ones(len(cube), dtype=bool)
+    for dimension, value in filters.items():
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown cube dimension: {dimension}")
+        if value is None:
+            continue
+        values = [value] if isinstance(value, str) else list(value)
+        if dimension == 'player':
+            values = [normalize_player_name(player) for player in values]
+        mask &= cube[dimension].isin(values).to_numpy()
+    years = cube['year'].to_numpy()
+    if first_season is not None:
+        mask &= years >= int(str(first_season)[-4:])
+    if last_season is not None:
+        mask &= years <= int(str(last_season)[-4:])
+    return cube[mask]
+
+def rollup(cube, by=(), first_season=None, last_season=None, **filters):
+    """
+    Sum the counters of the matching cells (see slice_cube) over everything
+    but the `by` dimensions, e.g.
+    
+        rollup(cube, by='season', player="JJ Bumrah", role='bowling', phase='death',
+               opponent="Chennai Super Kings", first_season=2020)
+    
+    gives Bumrah's death-over counters against CSK in each season since 2020.
+    When the role is filtered to one role its rates (strike rate, economy,
+    ...) are added.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    cells = slice_cube(cube, first_season, last_season, **filters)
+    if by:
+        table = cells.groupby(by, observed=True)[COUNTERS].sum().reset_index()
+    else:
+        table = cells[COUNTERS].sum().to_frame().T.reset_index(drop=True)
+    
+    role = filters.get('role')
+    if isinstance(role, str):
+        for name, rate in ROLE_RATES[role].items():
+            table[name] = rate(table).round(2)
+    return table
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the player x season x opponent x venue x phase roll-up cube")
+    parser.add_argument('--dataset-folder', default='IPL_dataset',
+                        help="folder containing the IPL*.csv season files")
+    parser.add_argument('--matches-file', default=MATCHES_FILE,
+                        help="match-level CSV the venues are read from")
+    parser.add_argument('--by', nargs='*', default=[], choices=DIMENSIONS,
+                        help="dimensions to keep; the counters are summed over the others")
+    parser.add_argument('--player', nargs='+', default=None,
+                        help="player(s), e.g. \"JJ Bumrah\"")
+    parser.add_argument('--role', choices=list(ROLE_RATES), default=None,
+                        help="batting or bowling (adds the rates of the role)")
+    parser.add_argument('--season', nargs='+', default=None,
+                        help="season(s), e.g. IPL2024")
+    parser.add_argument('--first-season', default=None,
+                        help="first season, e.g. 2020")
+    parser.add_argument('--last-season', default=None,
+                        help="last season, e.g. 2024")
+    parser.add_argument('--opponent', nargs='+', default=None,
+                        help="opponent team(s), e.g. \"Chennai Super Kings\"")
+    parser.add_argument('--venue', nargs='+', default=None,
+                        help="venue(s), e.g. \"Wankhede Stadium\"")
+    parser.add_argument('--phase', nargs='+', choices=PHASES, default=None,
+                        help="match phase(s)")
+    parser.add_argument('--output', default=None,
+                        help="CSV file to write the result to instead of printing it")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="ignore the cached cube")
+    args = parser.parse_args(argv)
+    
+    start = time.perf_counter()
+    cube = load_cube(args.dataset_folder, args.matches_file, use_cache=not args.rebuild)
+    print(f"Loaded cube of {len(cube)} cells in {time.perf_counter() - start:.2f}s")
+    
+    start = time.perf_counter()
+    table = rollup(cube, args.by, args.first_season, args.last_season,
+                   player=args.player, role=args.role, season=args.season,
+                   opponent=args.opponent, venue=args.venue, phase=args.phase)
+    print(f"Rolled up in {(time.perf_counter() - start) * 1000:.1f}ms")
+    
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"Wrote {len(table)} rows to {args.output}")
+    else:
+        print(table.to_string(index=False))
+
+if __name__ == "__main__":
+    main()
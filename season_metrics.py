@@ -0,0 +1,106 @@
+import argparse
+import time
+import pandas as pd
+from metrics import (batting_average, batting_strike_rate, bowling_average, bowling_economy,
+                     bowling_strike_rate, boundary_rate, dot_ball_percentage, percentage,
+                     wickets_per_ball, wickets_per_run)
+from player_store import load_player_store
+
+# Batting and bowling season metrics of many players in one grouped pass.
+# Rows are the per-match player rows (columns_order of generate_player_stats)
+# and groups are given by key columns, (player_name, season) by default, so
+# that a whole league's season table is a single call.
+DEFAULT_KEYS = ('player_name', 'season')
+
+def compute_season_metrics(df, by=DEFAULT_KEYS, sort=True):
+    """
+    One row per group (e.g. per player and season) with every batting and
+    bowling season metric, keyed by the `by` columns. With sort=False the
+    groups keep the order they first appear in.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    df = df.reset_index(drop=True)
+    runs = df['total_runs']
+    wickets = df['wickets_taken']
+    batted = df['balls_played'] > 0
+    flags = pd.DataFrame({
+        'fifty': runs >= 50,
+        'hundred': runs >= 100,
+        'duck': runs == 0,
+        'not_out': ~df['dismissed'].fillna(False).astype(bool),
+        'innings_batted': batted,
+        'high_strike_rate': batted & (df['batting_strike_rate'] > 140),
+        'three_wicket_haul': wickets >= 3,
+        'five_wicket_haul': wickets >= 5
+    })
+    frame = pd.concat([df, flags], axis=1)
+    
+    stats = frame.groupby(by, sort=sort, observed=True).agg(
+        matches=('match_id', 'size'),
+        # Batting
+        total_runs=('total_runs', 'sum'),
+        avg_runs=('total_runs', 'mean'),
+        total_balls_played=('balls_played', 'sum'),
+        highest_score=('total_runs', 'max'),
+        fifties=('fifty', 'sum'),
+        hundreds=('hundred', 'sum'),
+        ducks=('duck', 'sum'),
+        fours=('fours', 'sum'),
+        sixes=('sixes', 'sum'),
+        total_dismissals=('dismissed', 'sum'),
+        not_outs=('not_out', 'sum'),
+        avg_position=('batting_position', 'mean'),
+        innings_batted=('innings_batted', 'sum'),
+        high_strike_rate_innings=('high_strike_rate', 'sum'),
+        # Bowling
+        total_wickets=('wickets_taken', 'sum'),
+        avg_wickets=('wickets_taken', 'mean'),
+        total_balls_bowled=('balls_bowled', 'sum'),
+        total_runs_conceded=('runs_conceded', 'sum'),
+        dot_balls=('dot_balls', 'sum'),
+        three_wicket_hauls=('three_wicket_haul', 'sum'),
+        five_wicket_hauls=('five_wicket_haul', 'sum'),
+        avg_economy=('bowling_economy', 'mean'),
+        best_wickets=('wickets_taken', 'max'),
+        best_row=('wickets_taken', 'idxmax')
+    ).reset_index()
+    
+    # Best figures: most wickets in a match, with the runs of the first such match
+    stats['best_runs'] = df['runs_conceded'].to_numpy()[stats['best_row'].to_numpy()]
+    stats['best_figures'] = stats['best_wickets'].astype(str) + '/' + stats['best_runs'].astype(str)
+    stats = stats.drop(columns='best_row')
+    
+    # Derived metrics, see metrics.py for their zero-division results
+    stats['strike_rate'] = batting_strike_rate(stats['total_runs'], stats['total_balls_played'])
+    stats['runs_per_dismissal'] = batting_average(stats['total_runs'], stats['total_dismissals'])
+    stats['high_strike_rate_percentage'] = percentage(stats['high_strike_rate_innings'], stats['innings_batted'])
+    stats['boundary_rate'] = boundary_rate(stats['fours'], stats['sixes'], stats['matches'])
+    stats['total_overs'] = stats['total_balls_bowled'] / 6
+    stats['economy_rate'] = bowling_economy(stats['total_runs_conceded'], stats['total_balls_bowled'])
+    stats['runs_per_wicket'] = bowling_average(stats['total_runs_conceded'], stats['total_wickets'])
+    stats['balls_per_wicket'] = bowling_strike_rate(stats['total_balls_bowled'], stats['total_wickets'])
+    stats['wickets_per_balls'] = wickets_per_ball(stats['total_wickets'], stats['total_balls_bowled'])
+    stats['wickets_per_runs'] = wickets_per_run(stats['total_wickets'], stats['total_runs_conceded'])
+    stats['dot_ball_percentage'] = dot_ball_percentage(stats['dot_balls'], stats['total_balls_bowled'])
+    return stats
+
+def league_season_metrics(store=None):
+    """Season metrics of every player in the consolidated player store"""
+    store = store if store is not None else load_player_store()
+    if store is None:
+        raise ValueError("No player store; build it with player_store.py first")
+    return compute_season_metrics(store['frame'], by=('player', 'season'))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write the season metrics of every player in the league")
+    parser.add_argument('--output', default='season_metrics.csv',
+                        help="CSV file to write the table to")
+    args = parser.parse_args(argv)
+    
+    start = time.perf_counter()
+    stats = league_season_metrics()
+    stats.to_csv(args.output, index=False)
+    print(f"Wrote {len(stats)} player-seasons to {args.output} ({time.perf_counter() - start:.2f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -1,88 +1,76 @@
-import pandas as pd
+import argparse
 import matplotlib.pyplot as plt
-import seaborn as sns
+import plotting
 import os
+from player_loader import load_player_files
+from player_store import load_player_store
+from season_metrics import compute_season_metrics
+from output_profiles import PROFILES, output_files, save_dashboard
+from render_cache import is_render_current, record_render, render_key
 
-def combine_and_process_files(csv_files):
+def combine_and_process_files(csv_files, store=None):
     """
     Combine all CSV files for a player into a single DataFrame.
-    Add a 'season' column based on the last 4 digits of the filename.
+    Add 'season' (e.g. "IPL2012") and 'player_name' columns parsed from the
+    file name (see player_loader.py). When a consolidated player store is
+    given (see player_store.py) files it was built from are looked up there
+    instead of being opened.
     """
-    # Initialize an empty list to store DataFrames from each file
-    dataframes = []
-    
-    for csv_file in csv_files:
-        # Read each CSV file
-        df = pd.read_csv(csv_file)
-        
-        # Extract season (last 4 digits of the filename)
-        season = csv_file.split('_')[-1].split('.')[0]  # Extract "YYYY" from "PlayerName_YYYY.csv"
-        
-        # Add a 'season' column to the DataFrame
-        df['season'] = season
-        
-        # Append the DataFrame to the list
-        dataframes.append(df)
-    
-    # Combine all DataFrames into one
-    combined_df = pd.concat(dataframes, ignore_index=True)
-    
-    return combined_df
+    return load_player_files(csv_files, store=store)
 
 def calculate_season_metrics(combined_df):
     """
     Calculate season-wise metrics from the combined DataFrame.
     """
-    # Group by season and calculate metrics
-    season_metrics = combined_df.groupby('season').agg(
-        total_wickets=('wickets_taken', 'sum'),
-        total_balls_bowled=('balls_bowled', 'sum'),
-        total_runs_conceded=('runs_conceded', 'sum')
-    ).reset_index()
-    
-    # Calculate derived metrics
-    season_metrics['runs_per_wicket'] = season_metrics['total_runs_conceded'] / season_metrics['total_wickets']
-    season_metrics['balls_per_wicket'] = season_metrics['total_balls_bowled'] / season_metrics['total_wickets']
-    season_metrics['economy_rate'] = season_metrics['total_runs_conceded'] * 6 / season_metrics['total_balls_bowled']
-    
-    # Handle potential division-by-zero issues
-    season_metrics['runs_per_wicket'] = season_metrics['runs_per_wicket'].fillna(0)
-    season_metrics['balls_per_wicket'] = season_metrics['balls_per_wicket'].fillna(0)
-    
-    return season_metrics
+    # Group by season and calculate metrics (see season_metrics.py). Per-wicket
+    # metrics are undefined, so left out of the plots, in seasons without a wicket.
+    season_metrics = compute_season_metrics(combined_df, by='season')
+    return season_metrics[['season', 'total_wickets', 'total_balls_bowled', 'total_runs_conceded',
+                           'runs_per_wicket', 'balls_per_wicket', 'economy_rate']]
 
-def create_combined_dashboard(season_metrics, player_name):
+def create_combined_dashboard(season_metrics, player_name, force=False, profile='full'):
     """
     Create a combined dashboard with four graphs based on season-wise metrics.
+    The render is skipped when an image of the same metrics and layout exists.
     """
+    # Ensure the "output" folder exists
+    output_folder = "output"
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+    full_file = os.path.join(output_folder, f"{player_name}_combined_dashboard.png")
+    output_file = output_files(full_file, profile)[0]
+    
+    key = render_key('season_bowler_dashboard', season_metrics, title=player_name)
+    if not force and is_render_current(output_file, key):
+        return output_file
+    
     # Set style for better visualization
-    sns.set_theme(style="whitegrid")
-    plt.style.use('default')
+    plotting.apply_theme('default')
     
     # Create figure and subplots
     fig, axes = plt.subplots(2, 2, figsize=(15, 12))
     fig.suptitle(f"{player_name} Season-wise Performance Analysis", fontsize=16, y=0.95)
     
     # 1. Total wickets taken per season
-    sns.barplot(data=season_metrics, x='season', y='total_wickets', color='orange', ax=axes[0, 0])
+    plotting.barplot(axes[0, 0], season_metrics, 'season', 'total_wickets', color='orange')
     axes[0, 0].set_title('Total Wickets per Season')
     axes[0, 0].set_xlabel('Season')
     axes[0, 0].set_ylabel('Wickets')
     
     # 2. Runs per wicket
-    sns.lineplot(data=season_metrics, x='season', y='runs_per_wicket', marker='o', color='green', ax=axes[0, 1])
+    plotting.lineplot(axes[0, 1], season_metrics, 'season', 'runs_per_wicket', color='green')
     axes[0, 1].set_title('Average')
     axes[0, 1].set_xlabel('Season')
     axes[0, 1].set_ylabel('Runs/Wicket')
     
     # 3. Balls per wicket
-    sns.lineplot(data=season_metrics, x='season', y='balls_per_wicket', marker='o', color='blue', ax=axes[1, 0])
+    plotting.lineplot(axes[1, 0], season_metrics, 'season', 'balls_per_wicket', color='blue')
     axes[1, 0].set_title('Strike Rate')
     axes[1, 0].set_xlabel('Season')
     axes[1, 0].set_ylabel('Balls/Wicket')
     
     # 4. Economy rate per season
-    sns.barplot(data=season_metrics, x='season', y='economy_rate', color='red', ax=axes[1, 1])
+    plotting.barplot(axes[1, 1], season_metrics, 'season', 'economy_rate', color='red')
     axes[1, 1].set_title('Economy Rate per Season')
     axes[1, 1].set_xlabel('Season')
     axes[1, 1].set_ylabel('Economy Rate')
@@ -90,19 +78,14 @@ def create_combined_dashboard(season_metrics, player_name):
     # Adjust layout
     plt.tight_layout(rect=[0, 0, 1, 0.95])
     
-    # Ensure the "output" folder exists
-    output_folder = "output"
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
-    
-    # Save the dashboard as a PNG file
-    output_file = os.path.join(output_folder, f"{player_name}_combined_dashboard.png")
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    # Save the dashboard with the requested output profile
+    save_dashboard(fig, full_file, profile)
     plt.close()
+    record_render(output_file, key)
     
     return output_file
 
-def main():
+def main(argv=None):
     # List of CSV files for the player
     csv_files = [
     "SP_Narine_IPL2012.csv",
@@ -119,12 +102,20 @@ def main():
     "SP_Narine_IPL2023.csv",
     "SP_Narine_IPL2024.csv"
 ]
+
+    parser = argparse.ArgumentParser(description="Create the season-wise bowling dashboard of a player")
+    parser.add_argument('files', nargs='*', default=csv_files,
+                        help="per-player season CSVs of the player (default: the example player above)")
+    parser.add_argument('--profile', default='full', choices=list(PROFILES),
+                        help="output images to write, see output_profiles.py")
+    args = parser.parse_args(argv)
+    csv_files = args.files
     
     # Combine all CSV files into a single DataFrame
-    combined_df = combine_and_process_files(csv_files)
+    combined_df = combine_and_process_files(csv_files, load_player_store())
     
     # Extract player name from the first file
-    player_name = csv_files[0].split('_')[0]
+    player_name = os.path.basename(csv_files[0]).split('_')[0]
     
     # Calculate season-wise metrics
     season_metrics = calculate_season_metrics(combined_df)
@@ -134,7 +125,7 @@ def main():
     print(season_metrics)
     
     # Create the combined dashboard
-    dashboard_file = create_combined_dashboard(season_metrics, player_name)
+    dashboard_file = create_combined_dashboard(season_metrics, player_name, profile=args.profile)
     
     print(f"Dashboard created: {dashboard_file}")
 
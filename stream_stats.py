@@ -0,0 +1,121 @@
+import argparse
+import os
+import time
+import pandas as pd
+from deliveries_cache import CATEGORY_COLUMNS
+from generate_player_stats import get_season_match_stats
+
+# Default peak memory budget of the streaming path, in megabytes
+DEFAULT_MEMORY_BUDGET_MB = 64
+
+# Working copies made while a chunk is processed (flags, group-bys, merges)
+# relative to the parsed chunk itself
+PROCESSING_OVERHEAD = 6
+
+# Season totals carried across chunks for every player
+ACCUMULATED_COLUMNS = [
+    'matches',
+    'total_runs',
+    'balls_played',
+    'fours',
+    'sixes',
+    'dismissals',
+    'balls_bowled',
+    'dot_balls',
+    'wickets_taken',
+    'runs_conceded'
+]
+
+def rows_per_chunk(csv_file, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, sample_rows=2000):
+    """
+    Number of deliveries to read per chunk so that a chunk and its working
+    copies stay within the memory budget, measured on a sample of the file.
+    """
+    sample = pd.read_csv(csv_file, nrows=sample_rows,
+                         dtype={column: 'category' for column in CATEGORY_COLUMNS})
+    if sample.empty:
+        return sample_rows
+    bytes_per_row = sample.memory_usage(deep=True).sum() / len(sample) * PROCESSING_OVERHEAD
+    return max(1000, int(memory_budget_mb * 2 ** 20 / bytes_per_row))
+
+def iter_match_chunks(csv_file, chunk_rows):
+    """
+    Read a ball-by-ball file in chunks of about chunk_rows deliveries,
+    yielding only complete matches. The deliveries of the last match of a
+    chunk are held back and prepended to the next one, since the match may
+    continue there.
+    """
+    carry = None
+    reader = pd.read_csv(csv_file, chunksize=chunk_rows,
+                         dtype={column: 'category' for column in CATEGORY_COLUMNS})
+    for chunk in reader:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        last_match = chunk['match_id'].iloc[-1]
+        is_last_match = (chunk['match_id'] == last_match).to_numpy()
+        carry = chunk[is_last_match]
+        complete = chunk[~is_last_match]
+        if not complete.empty:
+            yield complete
+    if carry is not None and not carry.empty:
+        yield carry
+
+def accumulate(totals, match_stats):
+    """Add the per-match rows of a chunk to the per-player season totals"""
+    chunk_totals = match_stats.assign(
+        matches=1,
+        dismissals=match_stats['dismissed'].astype(int)
+    ).groupby('player')[ACCUMULATED_COLUMNS].sum()
+    if totals is None:
+        return chunk_totals
+    return totals.add(chunk_totals, fill_value=0).astype(int)
+
+def stream_player_stats(csv_files, output_file, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+    """
+    Generate per-match player statistics for one or more ball-by-ball files
+    (any league in the same 17-column schema) with bounded memory.
+    
+    Files are read in match-aligned chunks sized from memory_budget_mb; each
+    chunk's per-match rows are appended to output_file (with 'player' and
+    'source' columns) and only the per-player totals are kept in memory.
+    Returns the per-player totals over all files.
+    """
+    if os.path.exists(output_file):
+        os.remove(output_file)
+    
+    totals = None
+    for csv_file in csv_files:
+        start = time.perf_counter()
+        chunk_rows = rows_per_chunk(csv_file, memory_budget_mb)
+        delivery_count = 0
+        for chunk in iter_match_chunks(csv_file, chunk_rows):
+            match_stats = get_season_match_stats(chunk)
+            match_stats.insert(1, 'source', os.path.splitext(os.path.basename(csv_file))[0])
+            match_stats.to_csv(output_file, mode='a', header=not os.path.exists(output_file), index=False)
+            totals = accumulate(totals, match_stats)
+            delivery_count += len(chunk)
+        print(f"{csv_file}: {delivery_count} deliveries in chunks of {chunk_rows} rows, "
+              f"{time.perf_counter() - start:.2f}s")
+    
+    if totals is None:
+        return pd.DataFrame(columns=['player'] + ACCUMULATED_COLUMNS)
+    return totals.reset_index()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream player statistics out of large ball-by-ball files")
+    parser.add_argument('csv_files', nargs='+',
+                        help="ball-by-ball CSV files in the IPL_dataset schema")
+    parser.add_argument('--output', default='streamed_player_stats.csv',
+                        help="CSV file to write the per-match rows to")
+    parser.add_argument('--totals-output', default='streamed_player_totals.csv',
+                        help="CSV file to write the per-player totals to")
+    parser.add_argument('--memory-budget-mb', type=float, default=DEFAULT_MEMORY_BUDGET_MB,
+                        help="approximate peak memory to use for ingestion, in megabytes")
+    args = parser.parse_args(argv)
+    
+    totals = stream_player_stats(args.csv_files, args.output, args.memory_budget_mb)
+    totals.to_csv(args.totals_output, index=False)
+    print(f"Per-match statistics saved to {args.output}, totals of {len(totals)} players to {args.totals_output}")
+
+if __name__ == "__main__":
+    main()